@@ -0,0 +1,125 @@
+import logging
+
+# 状态矩阵中的取值：每个用户一行 bytes，每天一个字节
+EMPTY, DONE, MISSED, ELIMINATED = 0, 1, 2, 3
+STATUS_VALUES = {'✅': DONE, '⭕️': MISSED, '❌': ELIMINATED}
+
+
+def build_status_matrix(rows, days):
+    # rows 为每个用户按日期排列的格子（去掉空白后的字符串），长度不足的补 EMPTY
+    padding = bytes(days)
+    return [(bytes(STATUS_VALUES.get(status, EMPTY) for status in statuses[:days]) + padding)[:days]
+            for statuses in rows]
+
+
+# 返回 {'daily': [(打卡人数, 已判定人数, 当天淘汰人数, 当天结束时仍在的人数)],
+#       'weekly': [[缺勤 0..bins-1 次的人数]]（按 week_ids 中各周首次出现的顺序）,
+#       'streaks': [(最长连续打卡天数, 当前连续打卡天数)], 'eliminated_on': [淘汰日下标或 None]}
+# 有 numpy 时按整个矩阵向量化计算，否则逐行计算，两者结果相同
+def compute_analytics(matrix, days, week_ids, bins, backend=None):
+    if backend != 'python':
+        try:
+            import numpy
+        except ImportError:
+            if backend == 'numpy':
+                raise
+            logging.info("numpy not installed, computing statistics in pure Python")
+        else:
+            if matrix and days:
+                return compute_numpy(numpy, matrix, days, week_ids, bins)
+    return compute_python(matrix, days, week_ids, bins)
+
+
+def get_week_spans(week_ids):
+    spans = {}
+    for i, week in enumerate(week_ids):
+        start, _ = spans.get(week, (i, i))
+        spans[week] = (start, i + 1)
+    return list(spans.values())
+
+
+def compute_python(matrix, days, week_ids, bins):
+    done = [0] * days
+    evaluated = [0] * days
+    eliminated = [0] * days
+    eliminated_on = []
+    streaks = []
+    for row in matrix:
+        longest = current = run = 0
+        for i, value in enumerate(row):
+            if value == DONE:
+                done[i] += 1
+                run += 1
+                longest = max(longest, run)
+            else:
+                run = 0
+            if value != EMPTY:
+                evaluated[i] += 1
+                current = run
+        streaks.append((longest, current))
+        day = row.find(ELIMINATED)
+        eliminated_on.append(None if day < 0 else day)
+        if day >= 0:
+            eliminated[day] += 1
+    alive = len(matrix)
+    daily = []
+    for i in range(days):
+        alive -= eliminated[i]
+        daily.append((done[i], evaluated[i], eliminated[i], alive))
+
+    weekly = []
+    for start, end in get_week_spans(week_ids):
+        histogram = [0] * bins
+        for row in matrix:
+            week = row[start:end]
+            if week.count(EMPTY) == len(week):
+                continue
+            histogram[min(week.count(MISSED) + week.count(ELIMINATED), bins - 1)] += 1
+        weekly.append(histogram)
+    return {'daily': daily, 'weekly': weekly, 'streaks': streaks, 'eliminated_on': eliminated_on}
+
+
+def compute_numpy(np, matrix, days, week_ids, bins):
+    users = len(matrix)
+    data = np.frombuffer(b''.join(matrix), dtype=np.uint8).reshape(users, days)
+    is_done = data == DONE
+    is_evaluated = data != EMPTY
+    done = is_done.sum(axis=0)
+    evaluated = is_evaluated.sum(axis=0)
+
+    is_eliminated = data == ELIMINATED
+    has_eliminated = is_eliminated.any(axis=1)
+    first_eliminated = is_eliminated.argmax(axis=1)
+    eliminated = np.bincount(first_eliminated[has_eliminated], minlength=days)
+    alive = users - np.cumsum(eliminated)
+
+    # 连续打卡：以 0 隔开各行后整体展平，一次 diff 找出所有 ✅ 区间的起止位置
+    width = days + 1
+    padded = np.zeros((users, width), dtype=np.int8)
+    padded[:, :days] = is_done
+    edges = np.diff(np.concatenate(([0], padded.ravel())))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    lengths = ends - starts
+    run_rows = starts // width
+    longest = np.zeros(users, dtype=np.int64)
+    np.maximum.at(longest, run_rows, lengths)
+    # 当前连续打卡：结束在该行最后一个已判定格子上的区间
+    last_evaluated = days - 1 - is_evaluated[:, ::-1].argmax(axis=1)
+    current = np.zeros(users, dtype=np.int64)
+    is_current = (ends - 1) % width == last_evaluated[run_rows]
+    current[run_rows[is_current]] = lengths[is_current]
+
+    is_absent = (data == MISSED) | is_eliminated
+    weekly = []
+    for start, end in get_week_spans(week_ids):
+        active = is_evaluated[:, start:end].any(axis=1)
+        absences = np.minimum(is_absent[:, start:end].sum(axis=1)[active], bins - 1)
+        weekly.append(np.bincount(absences, minlength=bins).tolist())
+    return {
+        'daily': list(zip(done.tolist(), evaluated.tolist(), eliminated.tolist(), alive.tolist())),
+        'weekly': weekly,
+        'streaks': list(zip(longest.tolist(), current.tolist())),
+        'eliminated_on': [int(day) if flag else None
+                          for day, flag in zip(first_eliminated.tolist(), has_eliminated.tolist())],
+    }
@@ -0,0 +1,67 @@
+import os
+import random
+from datetime import timedelta
+
+from sync_status_readme import (Content_END_MARKER, Content_START_MARKER,
+                                TABLE_END_MARKER, TABLE_START_MARKER)
+
+TIMEZONES = ['Asia/Shanghai', 'Asia/Tokyo', 'America/Los_Angeles',
+             'America/New_York', 'Europe/London', 'Europe/Berlin', 'Australia/Sydney']
+ENTRY_TEXTS = [
+    'Daily English Dictation 第 {n} 节，听写了三遍并整理了生词。',
+    'Reviewed grammar notes: relative clauses, tenses and articles.',
+    '学习了 A Programmer\'s Guide to English 第 {n} 章，做了笔记和复盘。',
+    'short',
+    '',
+]
+
+
+def format_heading(day, style):
+    if style == 0:
+        return day.strftime('%Y.%m.%d')
+    if style == 1:
+        return f'{day.year}.{day.month}.{day.day}'
+    if style == 2:
+        return f'{day.month}.{day.day}'
+    if style == 3:
+        return day.strftime('%Y/%m/%d')
+    if style == 4:
+        return f'{day.month}/{day.day}'
+    return day.strftime('%m.%d')
+
+
+def generate_note(rng, nickname, start_date, days):
+    # template.md 格式的笔记：YAML 时区、混合的日期标题格式、空白或缺失的日期
+    parts = []
+    if rng.random() < 0.8:
+        parts.append(f'---\ntimezone: {rng.choice(TIMEZONES)}\n---\n\n')
+    parts.append(f'# {nickname}\nI am {nickname}, learning English for work.\n\n'
+                 '## Do you think you will finish the whole CoLearning program?\n'
+                 'Yes 100%\n\n'
+                 f'{Content_START_MARKER}\n')
+    style = rng.randrange(6)
+    for n in range(days):
+        if rng.random() < 0.1:
+            continue
+        day = start_date + timedelta(days=n)
+        heading_style = style if rng.random() < 0.9 else rng.randrange(6)
+        text = rng.choice(ENTRY_TEXTS).format(n=n)
+        parts.append(f'### {format_heading(day, heading_style)}\n{text}\n\n')
+    parts.append(f'{Content_END_MARKER}\n')
+    return ''.join(parts)
+
+
+def generate_cohort(directory, users, days, start_date, file_suffix, seed=0):
+    # 生成 users 份参与者笔记和带表格标记的 README，一半用户已在表格中
+    rng = random.Random(seed)
+    os.makedirs(directory, exist_ok=True)
+    nicknames = [f'user{i:05d}' for i in range(users)]
+    for nickname in nicknames:
+        with open(os.path.join(directory, f'{nickname}{file_suffix}'), 'w', encoding='utf-8') as file:
+            file.write(generate_note(rng, nickname, start_date, days))
+
+    rows = ''.join(f'| {nickname} |\n' for nickname in nicknames[:users // 2])
+    with open(os.path.join(directory, 'README.md'), 'w', encoding='utf-8') as file:
+        file.write('# Benchmark cohort\n\n'
+                   f'{TABLE_START_MARKER}\n| Name |\n| ------------- |\n{rows}{TABLE_END_MARKER}\n')
+    return nicknames
@@ -0,0 +1,111 @@
+import argparse
+import json
+import logging
+import os
+import platform
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import pytz
+
+import sync_status_readme
+from benchmarks.cohort import generate_cohort
+
+FILE_SUFFIX = '_EICL1st.md'
+SAMPLE_USERS = 50
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+
+def configure_window(days):
+    # 窗口以今天结束，使所有日期都参与计算
+    today = datetime.now(pytz.UTC).replace(hour=0, minute=0, second=0, microsecond=0)
+    sync_status_readme.START_DATE = today - timedelta(days=days - 1)
+    sync_status_readme.END_DATE = today.replace(hour=23, minute=59, second=59)
+    sync_status_readme.FILE_SUFFIX = FILE_SUFFIX
+    return sync_status_readme.START_DATE
+
+
+def run_case(users, days, workers):
+    results = []
+    start_date = configure_window(days)
+    with tempfile.TemporaryDirectory() as directory:
+        nicknames = generate_cohort(directory, users, days, start_date, FILE_SUFFIX)
+        cwd = os.getcwd()
+        os.chdir(directory)
+        try:
+            with open('README.md', 'r', encoding='utf-8') as file:
+                content = file.read()
+
+            seconds, new_content = timed(sync_status_readme.update_readme, content)
+            if new_content == content:
+                raise RuntimeError('update_readme did not render the table')
+            results.append(('update_readme', seconds, 1))
+
+            sample = nicknames[:SAMPLE_USERS]
+            seconds, _ = timed(lambda: [sync_status_readme.generate_user_row(user) for user in sample])
+            results.append(('generate_user_row', seconds, len(sample)))
+
+            notes = []
+            for user in sample:
+                with open(f'{user}{FILE_SUFFIX}', 'r', encoding='utf-8') as file:
+                    notes.append(file.read())
+            dates = sync_status_readme.get_date_range()
+            seconds, _ = timed(lambda: [sync_status_readme.check_md_content(note, date, pytz.UTC)
+                                        for note in notes for date in dates])
+            results.append(('check_md_content', seconds, len(notes) * len(dates)))
+
+            seconds, _ = timed(sync_status_readme.calculate_statistics, new_content)
+            results.append(('calculate_statistics', seconds, 1))
+        finally:
+            os.chdir(cwd)
+
+    return [{'benchmark': name, 'users': users, 'days': days, 'workers': workers,
+             'seconds': round(seconds, 6), 'calls': calls,
+             'seconds_per_call': round(seconds / calls, 9)}
+            for name, seconds, calls in results]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Benchmark sync_status_readme.py on synthetic cohorts.')
+    parser.add_argument('--users', type=int, nargs='+', default=[100, 1000, 10000])
+    parser.add_argument('--days', type=int, nargs='+', default=[21, 90, 365])
+    parser.add_argument('--workers', default='1',
+                        help="SYNC_WORKERS for update_readme: a number or 'auto'")
+    parser.add_argument('--output', help='write JSON results here instead of stdout')
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+    sync_status_readme.SYNC_WORKERS = args.workers
+    # 统计阶段不访问 GitHub API
+    sync_status_readme.get_fork_count = lambda: None
+
+    results = []
+    for users in args.users:
+        for days in args.days:
+            logging.warning(f"Benchmarking {users} users x {days} days")
+            results.extend(run_case(users, days, args.workers))
+
+    report = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'timestamp': datetime.now(pytz.UTC).isoformat(),
+        'results': results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            file.write(output + '\n')
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
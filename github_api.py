@@ -0,0 +1,300 @@
+import json
+import logging
+import math
+import os
+import threading
+import time
+
+GITHUB_API_URL = os.environ.get('GITHUB_API_URL', 'https://api.github.com')
+GITHUB_TOKEN = os.environ.get('GITHUB_TOKEN')
+# ETag 响应缓存文件（为空则只在内存中缓存）
+GITHUB_API_CACHE_FILE = os.environ.get(
+    'GITHUB_API_CACHE_FILE', '.github_api_cache.json')
+REQUEST_TIMEOUT = (5, 15)  # (连接, 读取) 秒
+MAX_RETRIES = 3
+BACKOFF_SECONDS = 1
+MAX_BACKOFF_SECONDS = 30
+# 所有请求共享的令牌桶：每秒最多 GITHUB_API_RATE 个请求，并发抓取时的线程数
+GITHUB_API_RATE = float(os.environ.get('GITHUB_API_RATE', '10'))
+FETCH_WORKERS = int(os.environ.get('GITHUB_FETCH_WORKERS', '8'))
+# 一批请求（fetch_all 或一次 fork 笔记读取）的总时限（秒）：超时后剩余请求直接使用缓存的响应，
+# 没有缓存的视为失败，由调用方回退到仓库中的数据；单个请求等待令牌最多 MAX_BACKOFF_SECONDS
+GITHUB_API_DEADLINE = float(os.environ.get('GITHUB_API_DEADLINE') or 120)
+PAGE_SIZE = 100
+RAW_MEDIA_TYPE = 'application/vnd.github.raw'
+
+
+class TokenBucket:
+    # 线程安全的令牌桶：每秒补充 rate 个令牌，最多积累 capacity 个。
+    # reserve() 登记接下来要发出的请求数和它们的时限，只有它们超过 X-RateLimit-Remaining
+    # 剩余的额度时，才把剩余额度均匀分配到 X-RateLimit-Reset 或时限（较早者）之前，
+    # 额度够用时按 max_rate 发送；
+    # 额度用完或触发次级限流时 pause() 让所有线程一起等待
+    def __init__(self, rate=GITHUB_API_RATE, capacity=None):
+        self.max_rate = rate
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.pending = 0
+        self.remaining = None
+        self.reset_at = 0.0
+        self.deadline = None
+        self.lock = threading.Lock()
+
+    def reserve(self, count, deadline=None):
+        with self.lock:
+            self.pending += count
+            self.deadline = deadline
+            self.update_rate()
+
+    # 调用方持有 lock
+    def update_rate(self):
+        if self.remaining is None or self.pending <= self.remaining:
+            self.rate = self.max_rate
+        else:
+            window = self.reset_at - time.time()
+            if self.deadline is not None:
+                window = min(window, self.deadline - time.monotonic())
+            window = max(window, 1.0)
+            self.rate = min(self.max_rate, max(self.remaining, 1) / window)
+
+    # 取得一个令牌；deadline（time.monotonic() 的时刻）之前取不到时不再等待，返回 False
+    def acquire(self, deadline=None):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                if deadline is not None and now >= deadline:
+                    self.pending = max(0, self.pending - 1)
+                    return False
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                wait = self.paused_until - now
+                if wait <= 0:
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        self.pending = max(0, self.pending - 1)
+                        return True
+                    wait = (1 - self.tokens) / self.rate
+                if deadline is not None and now + wait > deadline:
+                    self.pending = max(0, self.pending - 1)
+                    return False
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    def observe(self, response):
+        remaining = response.headers.get('X-RateLimit-Remaining')
+        reset = response.headers.get('X-RateLimit-Reset')
+        if remaining is None or reset is None:
+            return
+        try:
+            remaining, reset = int(remaining), float(reset)
+        except ValueError:
+            return
+        with self.lock:
+            self.remaining = remaining
+            self.reset_at = reset
+            self.update_rate()
+
+
+class GitHubClient:
+    # 共享连接池的 GitHub API 客户端：带 token 认证、ETag 条件请求、超时与退避重试，
+    # API 不可用时回退到上次成功的响应
+    def __init__(self, base_url=GITHUB_API_URL, token=GITHUB_TOKEN,
+                 cache_file=GITHUB_API_CACHE_FILE, timeout=REQUEST_TIMEOUT,
+                 max_retries=MAX_RETRIES, backoff=BACKOFF_SECONDS, bucket=None):
+        # requests 只在真正访问 API 时才导入，不调用 API 的命令不必承担它的导入开销
+        import requests
+        self.base_url = base_url.rstrip('/')
+        self.cache_file = cache_file
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.bucket = bucket or TokenBucket()
+        # 并发抓取期间不逐个请求写缓存文件，由 fetch_all() 结束时统一保存
+        self.autosave = True
+        self.cache_lock = threading.Lock()
+        self.session = requests.Session()
+        self.session.headers.update({
+            'Accept': 'application/vnd.github+json',
+            'User-Agent': 'sync-status-readme',
+        })
+        if token:
+            self.session.headers['Authorization'] = f'Bearer {token}'
+        self.cache = self.load_cache()
+
+    def load_cache(self):
+        if not self.cache_file:
+            return {}
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logging.warning(f"Ignoring unreadable GitHub API cache: {str(e)}")
+            return {}
+
+    def save_cache(self):
+        if not self.cache_file:
+            return
+        try:
+            with self.cache_lock, open(self.cache_file, 'w', encoding='utf-8') as file:
+                json.dump(self.cache, file, ensure_ascii=False)
+        except OSError as e:
+            logging.warning(f"Failed to write GitHub API cache: {str(e)}")
+
+    def get_retry_delay(self, response, attempt):
+        # 优先遵循 Retry-After / X-RateLimit-Reset，否则指数退避，单次等待有上限；
+        # 头部无法解析时同样按指数退避，不让异常中断整个请求
+        delay = self.backoff * 2 ** attempt
+        if response is not None:
+            retry_after = response.headers.get('Retry-After')
+            reset = response.headers.get('X-RateLimit-Reset')
+            try:
+                if retry_after:
+                    try:
+                        delay = float(retry_after)
+                    except ValueError:
+                        from email.utils import parsedate_to_datetime
+                        delay = parsedate_to_datetime(retry_after).timestamp() - time.time()
+                elif reset and response.headers.get('X-RateLimit-Remaining') == '0':
+                    delay = float(reset) - time.time()
+                if not math.isfinite(delay):
+                    raise ValueError(delay)
+            except (TypeError, ValueError, OverflowError):
+                delay = self.backoff * 2 ** attempt
+                logging.warning(f"Ignoring invalid rate limit headers: Retry-After={retry_after!r}, "
+                                f"X-RateLimit-Reset={reset!r}")
+        return min(max(delay, 0), MAX_BACKOFF_SECONDS)
+
+    def is_retryable(self, response):
+        if response.status_code >= 500 or response.status_code == 429:
+            return True
+        return response.status_code == 403 and (
+            response.headers.get('X-RateLimit-Remaining') == '0'
+            or 'Retry-After' in response.headers)
+
+    def get_json(self, path, deadline=None):
+        return self.request(path, deadline=deadline)
+
+    # 文件原始内容；调用方按 blob 缓存解析结果，这里不保存 ETag 缓存
+    def get_text(self, path, deadline=None):
+        return self.request(path, raw=True, use_cache=False, deadline=deadline)
+
+    # deadline 为 time.monotonic() 的时刻，过了之后不再发送或重试，回退到缓存的响应
+    def request(self, path, raw=False, use_cache=True, deadline=None):
+        import requests
+        if deadline is None:
+            deadline = time.monotonic() + MAX_BACKOFF_SECONDS
+        url = path if path.startswith('http') else f"{self.base_url}{path}"
+        cached = self.cache.get(url) if use_cache else None
+        headers = {'Accept': RAW_MEDIA_TYPE} if raw else {}
+        if cached and cached.get('etag'):
+            headers['If-None-Match'] = cached['etag']
+
+        for attempt in range(self.max_retries):
+            response = None
+            if not self.bucket.acquire(deadline):
+                logging.debug(f"GitHub API deadline reached before requesting {url}")
+                break
+            try:
+                response = self.session.get(
+                    url, headers=headers, timeout=self.timeout)
+                self.bucket.observe(response)
+                if response.status_code == 304 and cached:
+                    return cached['data']
+                if response.ok:
+                    data = response.text if raw else response.json()
+                    if use_cache:
+                        with self.cache_lock:
+                            self.cache[url] = {
+                                'etag': response.headers.get('ETag'), 'data': data}
+                        if self.autosave:
+                            self.save_cache()
+                    return data
+                if not self.is_retryable(response):
+                    logging.error(
+                        f"GitHub API request failed: {url} {response.status_code}")
+                    break
+                logging.warning(
+                    f"GitHub API request to {url} returned {response.status_code}, retrying")
+            except (requests.RequestException, ValueError) as e:
+                logging.warning(f"GitHub API request to {url} failed: {str(e)}")
+            if attempt + 1 < self.max_retries:
+                delay = self.get_retry_delay(response, attempt)
+                if response is not None and response.status_code in (403, 429):
+                    # 限流对所有线程生效，由令牌桶统一等待
+                    self.bucket.pause(delay)
+                else:
+                    time.sleep(min(delay, max(0.0, deadline - time.monotonic())))
+
+        if cached:
+            logging.warning(f"Using last known GitHub API response for {url}")
+            return cached['data']
+        return None
+
+    # 按顺序返回各 path 的结果（失败为 None）；请求在线程池中并发执行，速率由令牌桶限制，
+    # 全部请求在 deadline 之前完成，默认为 GITHUB_API_DEADLINE 秒之后
+    def fetch_all(self, paths, raw=False, workers=FETCH_WORKERS, deadline=None):
+        from concurrent.futures import ThreadPoolExecutor
+        if deadline is None:
+            deadline = time.monotonic() + GITHUB_API_DEADLINE
+        fetch = self.get_text if raw else self.get_json
+        self.autosave = False
+        self.bucket.reserve(len(paths), deadline)
+        try:
+            with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+                results = list(executor.map(lambda path: fetch(path, deadline), paths))
+        finally:
+            self.autosave = True
+            if not raw:
+                self.save_cache()
+        if time.monotonic() > deadline:
+            logging.warning(f"GitHub API deadline reached: {results.count(None)} of {len(paths)} "
+                            f"requests have no response")
+        return results
+
+    # 依次读取分页的列表，直到某一页不足 PAGE_SIZE 项
+    def get_pages(self, path, deadline=None):
+        items = []
+        page = 1
+        separator = '&' if '?' in path else '?'
+        while True:
+            data = self.get_json(f"{path}{separator}per_page={PAGE_SIZE}&page={page}", deadline)
+            if not data:
+                break
+            items.extend(data)
+            if len(data) < PAGE_SIZE:
+                break
+            page += 1
+        return items
+
+    def list_forks(self, owner, repo, deadline=None):
+        return self.get_pages(f"/repos/{owner}/{repo}/forks", deadline)
+
+    # 主仓库中最先添加 path 的 PR 的作者（没有对应的 PR 时为该提交的作者），查不到时返回 None
+    def get_file_author(self, owner, repo, path, deadline=None):
+        from urllib.parse import quote
+        commits = self.get_pages(f"/repos/{owner}/{repo}/commits?path={quote(path)}", deadline)
+        if not commits:
+            return None
+        first = commits[-1]
+        pulls = self.get_json(f"/repos/{owner}/{repo}/commits/{first['sha']}/pulls", deadline)
+        if pulls:
+            return min(pulls, key=lambda pull: pull['number'])['user']['login']
+        return (first.get('author') or {}).get('login')
+
+
+_client = None
+
+
+def get_client():
+    global _client
+    if _client is None:
+        _client = GitHubClient()
+    return _client
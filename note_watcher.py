@@ -0,0 +1,113 @@
+import ctypes
+import ctypes.util
+import logging
+import os
+import select
+import struct
+import time
+
+# inotify 常量，见 <sys/inotify.h>
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE
+EVENT_HEADER = struct.Struct('iIII')
+READ_SIZE = 64 * 1024
+DEFAULT_POLL_SECONDS = 5.0
+
+
+# wait(timeout) 的约定：返回发生变化的文件路径集合（超时为空集合）；
+# 事件丢失、需要重新扫描全部目录时返回 None
+class InotifyWatcher:
+    def __init__(self, directories):
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+        self.directories = {}
+        try:
+            for directory in directories:
+                wd = libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+                if wd < 0:
+                    raise OSError(ctypes.get_errno(), f'inotify_add_watch failed for {directory}')
+                self.directories[wd] = directory
+        except OSError:
+            os.close(self.fd)
+            raise
+
+    def wait(self, timeout=None):
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return set()
+        changed = set()
+        try:
+            data = os.read(self.fd, READ_SIZE)
+        except BlockingIOError:
+            return changed
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b'\0')
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                return None
+            if wd in self.directories and name:
+                changed.add(os.path.normpath(
+                    os.path.join(self.directories[wd], os.fsdecode(name))))
+        return changed
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    # 没有 inotify 时的回退方案：每隔 interval 秒比较目录中文件的 (mtime, 大小)
+    def __init__(self, directories, interval=DEFAULT_POLL_SECONDS):
+        self.directories = list(directories)
+        self.interval = interval
+        self.snapshot = self.scan()
+
+    def scan(self):
+        snapshot = {}
+        for directory in self.directories:
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        if entry.is_file():
+                            stat = entry.stat()
+                            snapshot[os.path.normpath(entry.path)] = (stat.st_mtime_ns, stat.st_size)
+            except OSError as e:
+                logging.warning(f"Failed to scan directory {directory}: {str(e)}")
+        return snapshot
+
+    def wait(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return set()
+            time.sleep(self.interval if remaining is None else min(self.interval, remaining))
+            snapshot = self.scan()
+            changed = {path for path in snapshot.keys() | self.snapshot.keys()
+                       if snapshot.get(path) != self.snapshot.get(path)}
+            self.snapshot = snapshot
+            if changed:
+                return changed
+
+    def close(self):
+        pass
+
+
+def create_watcher(directories, poll_interval=DEFAULT_POLL_SECONDS):
+    try:
+        watcher = InotifyWatcher(directories)
+        logging.info(f"Watching {', '.join(directories)} with inotify")
+        return watcher
+    except (OSError, AttributeError) as e:
+        logging.info(f"inotify unavailable ({str(e)}), polling every {poll_interval}s")
+        return PollingWatcher(directories, poll_interval)
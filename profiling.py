@@ -0,0 +1,92 @@
+import json
+import logging
+import time
+
+SLOWEST_FILES = 10
+
+
+class Stage:
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.profiler.add(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class NullStage:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+NULL_STAGE = NullStage()
+
+
+class Profiler:
+    # 按阶段累计耗时与调用次数，并记录每个笔记文件的处理耗时；未启用时 stage() 返回空上下文
+    def __init__(self):
+        self.reset()
+
+    def reset(self, enabled=False):
+        self.enabled = enabled
+        self.stages = {}
+        self.files = {}
+
+    def stage(self, name):
+        return Stage(self, name) if self.enabled else NULL_STAGE
+
+    def add(self, name, seconds, calls=1):
+        total = self.stages.setdefault(name, [0.0, 0])
+        total[0] += seconds
+        total[1] += calls
+
+    def add_file(self, path, seconds):
+        if self.enabled:
+            self.files[path] = self.files.get(path, 0.0) + seconds
+
+    def snapshot(self):
+        return {'stages': self.stages, 'files': self.files}
+
+    # 合并子进程返回的 snapshot()
+    def merge(self, snapshot):
+        for name, (seconds, calls) in snapshot['stages'].items():
+            self.add(name, seconds, calls)
+        for path, seconds in snapshot['files'].items():
+            self.add_file(path, seconds)
+
+    def report(self, slowest=SLOWEST_FILES):
+        stages = {name: {'seconds': round(seconds, 6), 'calls': calls}
+                  for name, (seconds, calls) in self.stages.items()}
+        files = sorted(self.files.items(), key=lambda item: item[1], reverse=True)
+        return {
+            'stages': stages,
+            'slowest_files': [{'file': path, 'seconds': round(seconds, 6)}
+                              for path, seconds in files[:slowest]],
+        }
+
+    def write(self, path):
+        report = self.report()
+        for name, stage in report['stages'].items():
+            logging.info(f"Profile {name}: {stage['seconds']:.3f}s in {stage['calls']} calls")
+        try:
+            with open(path, 'w', encoding='utf-8') as file:
+                json.dump(report, file, ensure_ascii=False, indent=2)
+            logging.info(f"Profile metrics written to {path}")
+        except OSError as e:
+            logging.warning(f"Failed to write profile metrics: {str(e)}")
+
+
+_profiler = Profiler()
+
+
+def get_profiler():
+    return _profiler
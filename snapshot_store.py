@@ -0,0 +1,72 @@
+import logging
+import sqlite3
+
+
+class SnapshotStore:
+    # 只追加的历史快照：某个共学日在用户当地已经过去后，该日的打卡状态写入 SQLite，
+    # 之后的运行直接读取，不再重新计算。cohort 为 get_cohort_key() 的结果，
+    # date 为共学日历中的日期（ISO 格式）。需要更正时用 reseal() 删除后重新生成
+    def __init__(self, path):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript('''
+            CREATE TABLE IF NOT EXISTS users (
+                cohort TEXT NOT NULL, user TEXT NOT NULL, timezone TEXT NOT NULL,
+                PRIMARY KEY (cohort, user));
+            CREATE TABLE IF NOT EXISTS days (
+                cohort TEXT NOT NULL, user TEXT NOT NULL, date TEXT NOT NULL, status TEXT NOT NULL,
+                PRIMARY KEY (cohort, user, date));
+        ''')
+
+    # {用户: (封存时的时区, {日期: 状态})}
+    def load(self, cohort):
+        sealed = {user: (timezone, {}) for user, timezone in self.connection.execute(
+            'SELECT user, timezone FROM users WHERE cohort = ?', (cohort,))}
+        for user, date, status in self.connection.execute(
+                'SELECT user, date, status FROM days WHERE cohort = ?', (cohort,)):
+            if user in sealed:
+                sealed[user][1][date] = status
+        return sealed
+
+    # rows 为 [(用户, 时区, {日期: 状态})]；已封存的日期和时区保持不变
+    def seal(self, cohort, rows):
+        count = 0
+        with self.connection:
+            for user, timezone, days in rows:
+                if not days:
+                    continue
+                self.connection.execute(
+                    'INSERT OR IGNORE INTO users VALUES (?, ?, ?)', (cohort, user, timezone))
+                self.connection.executemany(
+                    'INSERT OR IGNORE INTO days VALUES (?, ?, ?, ?)',
+                    [(cohort, user, date, status) for date, status in days.items()])
+                count += len(days)
+        if count:
+            logging.info(f"Sealed {count} days in {self.path}")
+
+    # 删除封存的状态，下次运行时重新计算；users 为空表示全部用户，since 之前的日期保留。
+    # 不带 since 时连同封存的时区一起删除
+    def reseal(self, cohort, users=(), since=None):
+        condition = 'cohort = ?'
+        params = [cohort]
+        if users:
+            condition += f" AND user IN ({', '.join('?' for _ in users)})"
+            params += list(users)
+        with self.connection:
+            days = self.connection.execute(
+                f'DELETE FROM days WHERE {condition}' + (' AND date >= ?' if since else ''),
+                params + ([since] if since else [])).rowcount
+            if not since:
+                self.connection.execute(f'DELETE FROM users WHERE {condition}', params)
+        return days
+
+    def close(self):
+        self.connection.close()
+
+
+def open_snapshot_store(path):
+    try:
+        return SnapshotStore(path)
+    except sqlite3.Error as e:
+        logging.warning(f"Snapshot store {path} unavailable, recomputing all days: {str(e)}")
+        return None
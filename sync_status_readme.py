@@ -1,10 +1,21 @@
 import os
+import sys
+import json
+import mmap
+import codecs
 import subprocess
 import re
-import requests
+import tempfile
+import time
+import argparse
 from datetime import datetime, timedelta
 import pytz
 import logging
+from collections import namedtuple
+from functools import lru_cache
+from itertools import repeat
+from array import array
+import profiling
 
 # Constants
 START_DATE = datetime.fromisoformat(os.environ.get(
@@ -12,6 +23,8 @@ START_DATE = datetime.fromisoformat(os.environ.get(
 END_DATE = datetime.fromisoformat(os.environ.get(
     'END_DATE', '2024-10-28T23:59:59+00:00')).replace(tzinfo=pytz.UTC)
 DEFAULT_TIMEZONE = 'Asia/Shanghai'
+# 时区实现：pytz（默认）或 zoneinfo（Python 3.9+，夏令时切换当天的零点更准确）
+TIMEZONE_BACKEND = os.environ.get('TIMEZONE_BACKEND', 'pytz')
 FILE_SUFFIX = os.environ.get('FILE_SUFFIX', '.md')
 README_FILE = 'README.md'
 FIELD_NAME = os.environ.get('FIELD_NAME', 'Name')
@@ -19,12 +32,86 @@ Content_START_MARKER = "<!-- Content_START -->"
 Content_END_MARKER = "<!-- Content_END -->"
 TABLE_START_MARKER = "<!-- START_COMMIT_TABLE -->"
 TABLE_END_MARKER = "<!-- END_COMMIT_TABLE -->"
+STATS_START_MARKER = "<!-- STATISTICALDATA_START -->"
+STATS_END_MARKER = "<!-- STATISTICALDATA_END -->"
 GITHUB_REPOSITORY_OWNER = os.environ.get('GITHUB_REPOSITORY_OWNER')
 GITHUB_REPOSITORY = os.environ.get('GITHUB_REPOSITORY')
+# 增量构建缓存文件（为空则不启用），在 GitHub Actions 中通过 actions/cache 跨运行保留
+STATUS_CACHE_FILE = os.environ.get('STATUS_CACHE_FILE', '')
+STATUS_CACHE_VERSION = 5
+# SQLite 历史快照文件（为空则不启用）：当地已经过去的日期封存后不再重新计算
+STATUS_SNAPSHOT_FILE = os.environ.get('STATUS_SNAPSHOT_FILE', '')
+# 沿用 README 中本周之前就已淘汰的用户的行，不再读取他们的笔记（默认关闭，见 get_frozen_rows）
+STATUS_FREEZE_ELIMINATED = os.environ.get('STATUS_FREEZE_ELIMINATED', '').lower() in ('1', 'true', 'yes')
+# 多期共学配置文件（JSON），为空则只处理由上面环境变量描述的一期
+SYNC_CONFIG = os.environ.get('SYNC_CONFIG', '')
+EXCLUDE_PREFIXES = ('template', 'readme')
+# 并行生成表格行的进程数：1 为串行，auto 为 CPU 核数
+SYNC_WORKERS = os.environ.get('SYNC_WORKERS', '1')
+# 性能分析：SYNC_PROFILE 为 1/true 时写入 DEFAULT_PROFILE_FILE，也可以直接给出 JSON 文件路径；
+# SYNC_CPROFILE 为 cProfile 统计文件路径（可用 python -m pstats 查看）
+SYNC_PROFILE = os.environ.get('SYNC_PROFILE', '')
+SYNC_CPROFILE = os.environ.get('SYNC_CPROFILE', '')
+DEFAULT_PROFILE_FILE = 'sync_profile.json'
+# 提交时间校验：只有在当地当天提交过的笔记内容才算打卡，防止事后补写
+VERIFY_COMMITS = os.environ.get('VERIFY_COMMITS', '').lower() in ('1', 'true', 'yes')
+# 打卡数据导出格式（逗号分隔）：jsonl、csv、parquet（需要安装 pyarrow），为空则不导出
+STATUS_EXPORT = os.environ.get('STATUS_EXPORT', '')
+EXPORT_FORMATS = ('jsonl', 'csv', 'parquet')
+# 导出时使用的单字符状态码（以格子文本为键），当天还没有内容为 'P'，空格子（未到日期或已淘汰）为 '-'
+STATUS_CODES = {'✅': 'Y', '⭕️': 'N', '❌': 'X', ' ': 'P', '': '-'}
+# 分页输出（为空则整张表写在 README 中）：initial 按昵称首字母分页，rows 或 rows:N 每页 N 行。
+# 分页写在 README 旁的 <README>.pages/ 目录中，README 的表格位置只保留分页目录
+STATUS_PAGES = os.environ.get('STATUS_PAGES', '')
+DEFAULT_PAGE_ROWS = 500
+# 共学期间也在统计数据中发布每日打卡率、留存率、每周缺勤分布和连续打卡（安装 numpy 时向量化计算）
+STATUS_ANALYTICS = os.environ.get('STATUS_ANALYTICS', '').lower() in ('1', 'true', 'yes')
+TOP_STREAKS = 10
+# 笔记来源：local 只读取仓库中的笔记；forks 同时通过 GitHub API 读取各 fork 中尚未合并的笔记
+NOTE_SOURCE = os.environ.get('NOTE_SOURCE', 'local')
+# 常驻模式（--watch）：合并连续修改的等待时间、一批变化的最长等待时间和轮询间隔（秒）
+WATCH_DEBOUNCE_SECONDS = float(os.environ.get('WATCH_DEBOUNCE_SECONDS', '2'))
+WATCH_MAX_DELAY_SECONDS = float(os.environ.get('WATCH_MAX_DELAY_SECONDS', '30'))
+WATCH_POLL_SECONDS = float(os.environ.get('WATCH_POLL_SECONDS', '5'))
+# 单个笔记的处理预算（0 为不限制）：超过大小（字节）或扫描时间（秒）的笔记跳过，
+# 表格中沿用该用户原来的行，避免一个异常文件拖慢所有人的更新
+NOTE_MAX_BYTES = int(os.environ.get('NOTE_MAX_BYTES') or 16 << 20)
+NOTE_TIME_BUDGET = float(os.environ.get('NOTE_TIME_BUDGET') or 5)
+SKIPPED_STATUS = "skipped: over budget"
+MIN_CONTENT_LENGTH = 10
+MAX_WEEKLY_ABSENCES = 2
+# 每日状态码：每个用户一个 array('B')，按距 START_DATE 的天数存放，只在渲染时才转换为表格文本。
+# CELL_NONE 为不显示的格子（未到日期或淘汰之后），CELL_PENDING 为当天还没有内容或将来的日期，
+# CELL_EMPTY 为日历中没有状态的日期（START_DATE 不在 UTC 零点时）
+CELL_NONE, CELL_DONE, CELL_ABSENT, CELL_ELIMINATED, CELL_PENDING, CELL_EMPTY = range(6)
+CELL_TEXT = (None, "✅", "⭕️", "❌", " ", "")
+CELL_CODES = {text: code for code, text in enumerate(CELL_TEXT)}
+CELL_RENDER = tuple(" |" if text is None else f" {text} |" for text in CELL_TEXT)
+CELL_STRIPPED = tuple((text or '').strip() for text in CELL_TEXT)
+# 匹配所有日期标题（[年.]月.日，分隔符为 . 或 /），也是上一天内容的结束位置；
+# 标题对应哪些日期由 get_heading_keys() 决定。
+# 笔记是不可信的输入：标题后的空白用 (?=(\s*))\1 一次吞掉（等价于原子组），匹配失败时不会
+# 在空白上逐个回退，其余部分长度有界，所以 finditer 整体与文本长度成线性
+DATE_HEADING_PATTERN = re.compile(
+    r'###(?=(\s*))\1(?:(\d{4})[\.\/])?(\d{1,2})[\.\/](\d+)')
+TIMEZONE_PATTERN = re.compile(r'---\s*\ntimezone:\s*(\S+)\s*\n---')
+# 直接在 mmap 的字节上定位标记和标题，只解码标题附近的小窗口和需要统计的段落
+HEADING_WINDOW = 256
+TIMEZONE_WINDOW = 1024
+SPAN_CHUNK_SIZE = 1 << 20
+# 字节上可能是日期标题的 "###"：其后为空白、数字或多字节字符（全角空白和数字），
+# 其余位置（例如一长串 #）在 C 层跳过，不逐个解码
+HEADING_CANDIDATE_PATTERN = re.compile(rb'###(?=[\s\d\x1c-\x1f\x80-\xff])')
+# 标题窗口如果整段都可能是标题的前缀（只有空白、数字和分隔符），就扩大窗口重新匹配
+HEADING_PREFIX_PATTERN = re.compile(r'###[\s\d\.\/]*')
+TABLE_ROW_PATTERN = re.compile(r'\|\s*([^|]+)\s*\|')
+README_MARKER_PATTERN = re.compile('|'.join(re.escape(marker) for marker in (
+    TABLE_START_MARKER, TABLE_END_MARKER, STATS_START_MARKER, STATS_END_MARKER)))
 
 # Configure logging
 logging.basicConfig(level=logging.INFO,
                     format='%(asctime)s - %(levelname)s - %(message)s')
+profiler = profiling.get_profiler()
 
 
 def print_env():
@@ -65,19 +152,134 @@ def print_variables(*args, **kwargs):
         print(f"{name}: {format_value(value)}")
 
 
-def get_date_range():
-    return [START_DATE + timedelta(days=x) for x in range((END_DATE - START_DATE).days + 1)]
+# 一期共学的配置：日期窗口、笔记目录与后缀、目标 README 和表头名称
+Cohort = namedtuple('Cohort', ['name', 'start_date', 'end_date', 'file_suffix',
+                               'directory', 'readme_file', 'field_name'])
+
+
+def get_default_cohort():
+    return Cohort('default', START_DATE, END_DATE, FILE_SUFFIX, '.', README_FILE, FIELD_NAME)
+
+
+def parse_cohort_date(value):
+    return datetime.fromisoformat(value).replace(tzinfo=pytz.UTC)
+
+
+# SYNC_CONFIG 格式：
+# {"cohorts": [{"name": "EICL1st", "start_date": "2024-10-08T00:00:00+00:00",
+#               "end_date": "2024-10-28T23:59:59+00:00", "file_suffix": "_EICL1st.md",
+#               "directory": ".", "readme_file": "README.md", "field_name": "EICL1st· Name"}]}
+# 未填写的字段使用环境变量对应的默认值
+def load_cohorts(config_file=None):
+    config_file = config_file or SYNC_CONFIG
+    default = get_default_cohort()
+    if not config_file:
+        return [default]
+    with open(config_file, 'r', encoding='utf-8') as file:
+        config = json.load(file)
+    cohorts = []
+    for item in config['cohorts']:
+        cohorts.append(default._replace(
+            name=item.get('name', item.get('directory', default.name)),
+            start_date=parse_cohort_date(item['start_date']) if 'start_date' in item else default.start_date,
+            end_date=parse_cohort_date(item['end_date']) if 'end_date' in item else default.end_date,
+            file_suffix=item.get('file_suffix', default.file_suffix),
+            directory=item.get('directory', default.directory),
+            readme_file=item.get('readme_file', default.readme_file),
+            field_name=item.get('field_name', default.field_name)))
+    return cohorts
+
+
+class CohortCalendar:
+    # 每次运行只构建一次的共学日历：日期列表、UTC 零点、日期到下标的映射和 ISO 周分组
+    def __init__(self, start_date, end_date):
+        self.days = [start_date + timedelta(days=x)
+                     for x in range((end_date - start_date).days + 1)]
+        self.midnights = [day.astimezone(pytz.UTC).replace(
+            hour=0, minute=0, second=0, microsecond=0) for day in self.days]
+        self.dates = [midnight.date() for midnight in self.midnights]
+        self.day_index = {date: i for i, date in enumerate(self.dates)}
+        # 共学日恰好落在 UTC 零点时才有状态，否则对应 CELL_EMPTY
+        self.aligned = [day == midnight for day, midnight in zip(self.days, self.midnights)]
+        self.unaligned = [i for i, aligned in enumerate(self.aligned) if not aligned]
+        self.week_ids = [date.isocalendar()[:2] for date in self.dates]
+        self.weeks = {}
+        for i, week in enumerate(self.week_ids):
+            self.weeks.setdefault(week, []).append(i)
+
+    def __len__(self):
+        return len(self.days)
+
+
+@lru_cache(maxsize=None)
+def get_cohort_calendar(start_date, end_date):
+    return CohortCalendar(start_date, end_date)
+
+
+def get_date_range(cohort=None):
+    cohort = cohort or get_default_cohort()
+    return get_cohort_calendar(cohort.start_date, cohort.end_date).days
+
+
+# 按名称缓存的时区对象，未知时区返回 None；同名时区在整个进程里只解析一次
+@lru_cache(maxsize=None)
+def resolve_timezone(name):
+    if TIMEZONE_BACKEND == 'zoneinfo':
+        import zoneinfo
+        try:
+            return zoneinfo.ZoneInfo(name)
+        except (zoneinfo.ZoneInfoNotFoundError, ValueError):
+            return None
+    try:
+        return pytz.timezone(name)
+    except pytz.exceptions.UnknownTimeZoneError:
+        return None
+
+
+def localize(user_tz, naive):
+    return user_tz.localize(naive) if hasattr(user_tz, 'localize') else naive.replace(tzinfo=user_tz)
 
 
 def get_user_timezone(file_content):
-    yaml_match = re.search(r'---\s*\ntimezone:\s*(\S+)\s*\n---', file_content)
+    yaml_match = TIMEZONE_PATTERN.search(file_content)
     if yaml_match:
-        try:
-            return pytz.timezone(yaml_match.group(1))
-        except pytz.exceptions.UnknownTimeZoneError:
-            logging.warning(
-                f"Unknown timezone: {yaml_match.group(1)}. Using default {DEFAULT_TIMEZONE}.")
-    return pytz.timezone(DEFAULT_TIMEZONE)
+        user_tz = resolve_timezone(yaml_match.group(1))
+        if user_tz is not None:
+            return user_tz
+        logging.warning(
+            f"Unknown timezone: {yaml_match.group(1)}. Using default {DEFAULT_TIMEZONE}.")
+    return resolve_timezone(DEFAULT_TIMEZONE)
+
+
+# 各时区当地“今天”的零点。同一时区的用户共享一次计算；以精确到分钟的 UTC 时间为键，
+# 各时区的零点都落在整分钟上，所以跨过零点后缓存自然失效（常驻模式下也成立）
+def get_local_today(user_tz):
+    return get_zone_today(user_tz, datetime.now(pytz.UTC).replace(second=0, microsecond=0))
+
+
+@lru_cache(maxsize=1024)
+def get_zone_today(user_tz, minute):
+    return minute.astimezone(user_tz).replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+DAY_PAST, DAY_TODAY, DAY_FUTURE = 0, 1, 2
+# kinds：每个共学日相对当地“今天”是过去、今天还是将来；hidden：表格中是否还不显示该日
+ZoneDays = namedtuple('ZoneDays', ['today', 'kinds', 'hidden'])
+
+
+# 日期边界只依赖共学日历和当地“今天”，同一时区的所有用户共享同一个 ZoneDays。
+# 当地墙上时间也作为缓存键：相差 24 小时的时区（如 +14 与 -10）零点是同一时刻，但日期不同
+def get_zone_days(calendar, today):
+    return build_zone_days(calendar, today, today.replace(tzinfo=None))
+
+
+@lru_cache(maxsize=1024)
+def build_zone_days(calendar, today, local_today):
+    kinds = tuple(DAY_TODAY if day.day == today.day else DAY_FUTURE if day > today else DAY_PAST
+                  for day in calendar.days)
+    hidden = tuple(midnight > today and midnight.day > today.day
+                   for midnight in calendar.midnights)
+    return ZoneDays(today, kinds, hidden)
 
 
 def extract_content_between_markers(file_content):
@@ -111,216 +313,1013 @@ def extract_content_between_markers(file_content):
 #     return file_content[second_start + len(Content_START_MARKER):end_index].strip()
 
 
+class NoteOverBudget(Exception):
+    pass
+
+
+# 当前笔记的扫描截止时间，None 表示不限制
+def get_note_deadline():
+    return time.perf_counter() + NOTE_TIME_BUDGET if NOTE_TIME_BUDGET > 0 else None
+
+
+def check_note_deadline(deadline):
+    if deadline is not None and time.perf_counter() > deadline:
+        raise NoteOverBudget(f"scanning took more than {NOTE_TIME_BUDGET}s")
+
+
+def check_note_size(size):
+    if NOTE_MAX_BYTES > 0 and size > NOTE_MAX_BYTES:
+        raise NoteOverBudget(f"{size} bytes exceeds the {NOTE_MAX_BYTES} byte limit")
+
+
+# 返回标题对应的 [((年或None, 月, 日), 多出的数字个数)]，规则与最初逐日匹配的写法相同：
+# 月和日同为两位（2024.07.03、07.03）或同为去掉前导零的写法（2024.7.3、7.3、10.5），
+# . 和 / 可以互换；日只比较开头，所以 7.20 同时也是 7.2，多出的数字算作这一天的内容
+def get_heading_keys(heading):
+    _, year, month, day = heading.groups()
+    year = int(year) if year else None
+    keys = {}
+    if len(month) == 2 and len(day) >= 2:
+        keys[(year, int(month), int(day[:2]))] = len(day) - 2
+    if month[0] != '0' and day[0] != '0':
+        for size in range(1, min(len(day), 2) + 1):
+            keys.setdefault((year, int(month), int(day[:size])), len(day) - size)
+    return list(keys.items())
+
+
+# keys 为 get_heading_keys() 的结果；start、end 为标题在所扫描文本（mmap 时为字节缓冲区）中的位置
+DateHeading = namedtuple('DateHeading', ['keys', 'text', 'start', 'end'])
+
+
+# 从 start 开始一次向前扫描，依次返回 content 中的 DateHeading
+def iter_date_headings(content, start=0, deadline=None):
+    for heading in DATE_HEADING_PATTERN.finditer(content, start):
+        check_note_deadline(deadline)
+        yield DateHeading(get_heading_keys(heading), heading.group(0), heading.start(), heading.end())
+
+
+# 每个日期窗口只构建一次：{(年或None, 月, 日): [当地日期]}，标题匹配后直接查表
+@lru_cache(maxsize=None)
+def get_date_heading_lookup(start_date, end_date, tz=pytz.UTC):
+    lookup = {}
+    for x in range((end_date - start_date).days + 1):
+        local_date = (start_date + timedelta(days=x)).astimezone(tz).date()
+        lookup.setdefault((local_date.year, local_date.month, local_date.day),
+                          []).append(local_date)
+        lookup.setdefault((None, local_date.month, local_date.day),
+                          []).append(local_date)
+    return lookup
+
+
+# 返回该日期的第一个标题；标题只有开头与日期相同时（7.20 算作 7.2），end 前移到多出的数字之前
 def find_date_in_content(content, local_date):
-    date_patterns = [
-        r'###\s*' + local_date.strftime("%Y.%m.%d"),
-        r'###\s*' + local_date.strftime("%Y.%m.%d").replace('.0', '.'),
-        r'###\s*' +
-        local_date.strftime("%m.%d").lstrip('0').replace('.0', '.'),
-        r'###\s*' + local_date.strftime("%Y/%m/%d"),
-        r'###\s*' +
-        local_date.strftime("%m/%d").lstrip('0').replace('/0', '/'),
-        r'###\s*' + local_date.strftime("%m.%d").zfill(5),
-        r'###\s*' + local_date.strftime("%Y.%m.%d")  # 新增：完整年月日格式
-    ]
-
-    combined_pattern = '|'.join(date_patterns)
-    return re.search(combined_pattern, content)
+    keys = {(local_date.year, local_date.month, local_date.day),
+            (None, local_date.month, local_date.day)}
+    for heading in iter_date_headings(content):
+        for key, extra in heading.keys:
+            if key in keys:
+                return heading._replace(end=heading.end - extra)
+    return None
 
 
 def get_content_for_date(content, start_pos):
-    next_date_pattern = r'###\s*(\d{4}\.)?(\d{1,2}[\.\/]\d{1,2})'
-    next_date_match = re.search(next_date_pattern, content[start_pos:])
-    if next_date_match:
-        return content[start_pos:start_pos + next_date_match.start()]
+    next_heading = next(iter_date_headings(content, start_pos), None)
+    if next_heading:
+        return content[start_pos:next_heading.start]
     return content[start_pos:]
 
 
-def check_md_content(file_content, date, user_tz):
-    try:
+# 一次扫描笔记，返回与日期窗口无关的 [(标题键, 该标题下非空白字符数)]，按出现顺序排列
+# （一个标题可能对应多个标题键）；
+# 超过 NOTE_MAX_BYTES 或 NOTE_TIME_BUDGET 时抛出 NoteOverBudget
+def scan_note_entries(file_content):
+    check_note_size(len(file_content.encode('utf-8')))
+    deadline = get_note_deadline()
+    with profiler.stage('markers'):
         content = extract_content_between_markers(file_content)
-        local_date = date.astimezone(user_tz).replace(
-            hour=0, minute=0, second=0, microsecond=0)
-        current_date_match = find_date_in_content(content, local_date)
+    with profiler.stage('headings'):
+        return [(key, length + extra)
+                for heading, length in iter_note_headings(content, deadline)
+                for key, extra in heading.keys]
+
+
+# 依次返回 (DateHeading, 该标题到下一个日期标题之间的非空白字符数)
+def iter_note_headings(content, deadline=None):
+    headings = list(iter_date_headings(content, deadline=deadline))
+    for i, heading in enumerate(headings):
+        end = headings[i + 1].start if i + 1 < len(headings) else len(content)
+        yield heading, len(''.join(content[heading.end:end].split()))
+
+
+def decode_window(buffer, start, end):
+    # 窗口边界可能切在多字节字符中间，忽略不完整的字节
+    return buffer[start:end].decode('utf-8', errors='ignore')
+
+
+# 分块统计 buffer[start:end] 中的非空白字符数，内存占用与段落大小无关
+def count_visible_chars(buffer, start, end, deadline=None):
+    if end - start <= SPAN_CHUNK_SIZE:
+        return sum(map(len, buffer[start:end].decode('utf-8', errors='replace').split()))
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+    count = 0
+    for position in range(start, end, SPAN_CHUNK_SIZE):
+        check_note_deadline(deadline)
+        text = decoder.decode(buffer[position:min(position + SPAN_CHUNK_SIZE, end)])
+        count += sum(map(len, text.split()))
+    return count + sum(map(len, decoder.decode(b'', final=True).split()))
+
+
+# 与 get_user_timezone 相同的规则，只解码每个 "timezone:" 附近的窗口
+def find_note_timezone(buffer, deadline=None):
+    position = buffer.find(b'timezone:')
+    while position != -1:
+        check_note_deadline(deadline)
+        window = decode_window(buffer, max(0, position - TIMEZONE_WINDOW),
+                               position + TIMEZONE_WINDOW)
+        yaml_match = TIMEZONE_PATTERN.search(window)
+        if yaml_match:
+            user_tz = resolve_timezone(yaml_match.group(1))
+            if user_tz is not None:
+                return user_tz
+            logging.warning(
+                f"Unknown timezone: {yaml_match.group(1)}. Using default {DEFAULT_TIMEZONE}.")
+            break
+        position = buffer.find(b'timezone:', position + 1)
+    return resolve_timezone(DEFAULT_TIMEZONE)
+
+
+# 与 iter_note_headings 相同的结果，但直接扫描字节：找到可能的标题后只解码一个小窗口
+# 交给 DATE_HEADING_PATTERN 匹配，标题之间的内容分块统计。窗口加倍重试的总读取量不超过两倍
+def iter_buffer_headings(buffer, start, end, deadline=None):
+    headings = []
+    candidate = HEADING_CANDIDATE_PATTERN.search(buffer, start, end)
+    while candidate:
+        check_note_deadline(deadline)
+        position = candidate.start()
+        size = HEADING_WINDOW
+        while True:
+            stop = min(position + size, end)
+            window = decode_window(buffer, position, stop)
+            if stop == end or not HEADING_PREFIX_PATTERN.fullmatch(window):
+                break
+            size *= 2
+        heading = DATE_HEADING_PATTERN.match(window)
+        if heading:
+            heading_end = position + len(window[:heading.end()].encode('utf-8'))
+            headings.append(DateHeading(get_heading_keys(heading), heading.group(0),
+                                        position, heading_end))
+            candidate = HEADING_CANDIDATE_PATTERN.search(buffer, heading_end, end)
+        else:
+            candidate = HEADING_CANDIDATE_PATTERN.search(buffer, position + 1, end)
+    for i, heading in enumerate(headings):
+        span_end = headings[i + 1].start if i + 1 < len(headings) else end
+        yield heading, count_visible_chars(buffer, heading.end, span_end, deadline)
+
+
+# 用 mmap 读取笔记，返回 (时区, 文件大小, [(DateHeading, 非空白字符数)])；峰值内存不随文件大小增长。
+# 超过 NOTE_MAX_BYTES 时不读取，扫描超过 NOTE_TIME_BUDGET 时中止，都抛出 NoteOverBudget
+def scan_note_file(path):
+    with open(path, 'rb') as file:
+        with profiler.stage('read'):
+            size = os.fstat(file.fileno()).st_size
+            check_note_size(size)
+            buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) if size else b''
+        try:
+            deadline = get_note_deadline()
+            user_tz = find_note_timezone(buffer, deadline)
+            with profiler.stage('markers'):
+                start = buffer.find(Content_START_MARKER.encode('utf-8'))
+                end = buffer.find(Content_END_MARKER.encode('utf-8'))
+            if start == -1 or end == -1:
+                logging.warning("Content_START_MARKER markers not found in the file")
+                return user_tz, size, []
+            with profiler.stage('headings'):
+                headings = list(iter_buffer_headings(
+                    buffer, start + len(Content_START_MARKER.encode('utf-8')), end, deadline))
+            return user_tz, size, headings
+        finally:
+            if size:
+                buffer.close()
+
+
+# 只查找笔记中的时区，不扫描标题；读取失败时返回 None
+def read_note_timezone(path):
+    try:
+        with open(path, 'rb') as file:
+            if not os.fstat(file.fileno()).st_size:
+                return str(resolve_timezone(DEFAULT_TIMEZONE))
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                return str(find_note_timezone(buffer, get_note_deadline()))
+    except (OSError, NoteOverBudget) as e:
+        logging.warning(f"Failed to read the timezone of {path}: {str(e)}")
+        return None
 
-        if not current_date_match:
-            logging.info(
-                f"No match found for date {local_date.strftime('%Y-%m-%d')}")
-            return False
 
-        date_content = get_content_for_date(content, current_date_match.end())
-        date_content = re.sub(r'\s', '', date_content)
-        logging.info(
-            f"Content length for {local_date.strftime('%Y-%m-%d')}: {len(date_content)}")
-        return len(date_content) > 10
-    except Exception as e:
-        logging.error(f"Error in check_md_content: {str(e)}")
+# 按共学期的日期窗口把标题映射到日期：{日期: 非空白字符数}，同一日期以第一个标题为准
+def index_note_entries(entries, cohort):
+    lookup = get_date_heading_lookup(cohort.start_date, cohort.end_date)
+    index = {}
+    for key, length in entries:
+        for date in lookup.get(key, ()):
+            index.setdefault(date, length)
+    return index
+
+
+# commit_days 为 None 表示不校验提交时间
+def has_entry(entry_index, date, commit_days=None):
+    return (entry_index.get(date.date(), 0) > MIN_CONTENT_LENGTH
+            and (commit_days is None or date.date() in commit_days))
+
+
+def check_md_content(file_content, date, user_tz):
+    content = extract_content_between_markers(file_content)
+    local_date = date.astimezone(user_tz).replace(
+        hour=0, minute=0, second=0, microsecond=0)
+    current_heading = find_date_in_content(content, local_date)
+
+    if not current_heading:
+        logging.debug(
+            f"No match found for date {local_date.strftime('%Y-%m-%d')}")
         return False
 
+    date_content = get_content_for_date(content, current_heading.end)
+    content_length = len(''.join(date_content.split()))
+    logging.debug(
+        f"Content length for {local_date.strftime('%Y-%m-%d')}: {content_length}")
+    return content_length > MIN_CONTENT_LENGTH
+
+
+def get_note_path(nickname, cohort=None):
+    cohort = cohort or get_default_cohort()
+    return os.path.normpath(os.path.join(cohort.directory, f"{nickname}{cohort.file_suffix}"))
+
+
+def read_note(path):
+    user_tz, size, headings = scan_note_file(path)
+    entries = [(key, length + extra) for heading, length in headings for key, extra in heading.keys]
+    logging.debug(
+        f"File size for {path}: {size} user_tz: {user_tz} headings: {len(entries)}")
+    return user_tz, entries
+
+
+def load_user_note(nickname, cohort=None):
+    cohort = cohort or get_default_cohort()
+    user_tz, entries = read_note(get_note_path(nickname, cohort))
+    return user_tz, index_note_entries(entries, cohort)
 
-def get_user_study_status(nickname):
-    user_status = {}
-    file_name = f"{nickname}{FILE_SUFFIX}"
+
+# 返回按共学日下标存放的状态码 array('B')：CELL_DONE、CELL_ABSENT 或 CELL_PENDING
+def get_user_study_status(nickname, note=None, cohort=None, commit_days=None):
+    file_name = get_note_path(nickname, cohort)
     try:
-        with open(file_name, 'r', encoding='utf-8') as file:
-            file_content = file.read()
-        user_tz = get_user_timezone(file_content)
+        user_tz, entry_index = note or load_user_note(nickname, cohort)
+        cohort = cohort or get_default_cohort()
+        calendar = get_cohort_calendar(cohort.start_date, cohort.end_date)
+        zone_days = get_zone_days(calendar, get_local_today(user_tz))
+
+        user_status = array('B', [CELL_PENDING]) * len(calendar)
+        for i, (date, kind) in enumerate(zip(calendar.days, zone_days.kinds)):
+            if kind == DAY_FUTURE:
+                continue
+            if has_entry(entry_index, date, commit_days):
+                user_status[i] = CELL_DONE
+            elif kind == DAY_PAST:
+                user_status[i] = CELL_ABSENT
+
+        # 每个用户一行汇总，逐日的匹配细节只在 DEBUG 级别输出
         logging.info(
-            f"File content length for {nickname}: {len(file_content)} user_tz: {user_tz}")
-        current_date = datetime.now(user_tz).replace(
-            hour=0, minute=0, second=0, microsecond=0)  # - timedelta(days=1)
-
-        for date in get_date_range():
-            local_date = date.astimezone(user_tz).replace(
-                hour=0, minute=0, second=0, microsecond=0)
-
-            if date.day == current_date.day:
-                user_status[date] = "✅" if check_md_content(
-                    file_content, date, pytz.UTC) else " "
-            elif date > current_date:
-                user_status[date] = " "
-            else:
-                user_status[date] = "✅" if check_md_content(
-                    file_content, date, pytz.UTC) else "⭕️"
-
-        logging.info(f"Successfully processed file for user: {nickname}")
+            f"Processed {nickname}: {user_status.count(CELL_DONE)} done, "
+            f"{user_status.count(CELL_ABSENT)} missed, "
+            f"{user_status.count(CELL_PENDING)} pending of {len(user_status)} days")
     except FileNotFoundError:
         logging.error(f"Error: Could not find file {file_name}")
-        user_status = {date: "⭕️" for date in get_date_range()}
+        user_status = array('B', [CELL_ABSENT]) * len(get_date_range(cohort))
     except Exception as e:
         logging.error(
             f"Unexpected error processing file for {nickname}: {str(e)}")
-        user_status = {date: "⭕️" for date in get_date_range()}
+        user_status = array('B', [CELL_ABSENT]) * len(get_date_range(cohort))
     return user_status
 
 
-def check_weekly_status(user_status, date, user_tz):
+def check_weekly_status(user_status, date, user_tz, cohort=None):
     try:
         local_date = date.astimezone(user_tz).replace(
             hour=0, minute=0, second=0, microsecond=0)
         week_start = (local_date - timedelta(days=local_date.weekday()))
         week_dates = [week_start + timedelta(days=x) for x in range(7)]
-        current_date = datetime.now(user_tz).replace(
-            hour=0, minute=0, second=0, microsecond=0)
-        week_dates = [d for d in week_dates if d.astimezone(pytz.UTC).date() in [
-            date.date() for date in get_date_range()] and d <= min(local_date, current_date)]
-
-        missing_days = sum(1 for d in week_dates if user_status.get(datetime.combine(
-            d.astimezone(pytz.UTC).date(), datetime.min.time()).replace(tzinfo=pytz.UTC), "⭕️") == "⭕️")
-
-        if local_date == current_date and missing_days > 2:
-            return "❌"
-        elif local_date < current_date and missing_days > 2:
-            return "❌"
+        current_date = get_local_today(user_tz)
+        cohort = cohort or get_default_cohort()
+        day_index = get_cohort_calendar(cohort.start_date, cohort.end_date).day_index
+        week_dates = [d for d in week_dates if d.astimezone(pytz.UTC).date() in day_index
+                      and d <= min(local_date, current_date)]
+
+        missing_days = sum(1 for d in week_dates if get_day_status(
+            user_status, cohort, d.astimezone(pytz.UTC).date()) == CELL_ABSENT)
+
+        if local_date == current_date and missing_days > MAX_WEEKLY_ABSENCES:
+            return CELL_ELIMINATED
+        elif local_date < current_date and missing_days > MAX_WEEKLY_ABSENCES:
+            return CELL_ELIMINATED
         elif local_date > current_date:
-            return " "
+            return CELL_PENDING
         else:
-            return user_status.get(datetime.combine(date.date(), datetime.min.time()).replace(tzinfo=pytz.UTC), "⭕️")
+            return get_day_status(user_status, cohort, date.date())
     except Exception as e:
         logging.error(f"Error in check_weekly_status: {str(e)}")
-        return "⭕️"
+        return CELL_ABSENT
+
+
+# get_user_study_status() 结果中某个 UTC 日期的状态码，不在共学期内或没有状态时视为缺勤
+def get_day_status(user_status, cohort, date):
+    calendar = get_cohort_calendar(cohort.start_date, cohort.end_date)
+    i = calendar.day_index.get(date)
+    if i is None or not calendar.aligned[i]:
+        return CELL_ABSENT
+    return user_status[i]
+
+
+# 一次递归 os.scandir 遍历，返回 {目录: [文件名]}；只进入各期笔记目录及通往它们的上级目录
+def discover_note_files(cohorts):
+    targets = {os.path.abspath(cohort.directory): os.path.normpath(cohort.directory)
+               for cohort in cohorts}
+    files = {directory: [] for directory in targets.values()}
+    pending = [target for target in targets
+               if not any(target.startswith(other + os.sep) for other in targets)]
+    while pending:
+        directory = pending.pop()
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        if any(target == entry.path or target.startswith(entry.path + os.sep)
+                               for target in targets):
+                            pending.append(entry.path)
+                    elif directory in targets and entry.is_file():
+                        files[targets[directory]].append(entry.name)
+        except OSError as e:
+            logging.warning(f"Failed to scan directory {directory}: {str(e)}")
+    return files
+
+
+def get_all_user_files(cohort=None, files=None):
+    cohort = cohort or get_default_cohort()
+    if files is None:
+        files = discover_note_files([cohort])
+    suffix = cohort.file_suffix
+    return [f[:-len(suffix)] for f in files.get(os.path.normpath(cohort.directory), [])
+            if f.lower().endswith(suffix.lower())
+            and not f.lower().startswith(EXCLUDE_PREFIXES)]
+
+
+def file_exists(user, cohort=None):
+    return os.path.exists(get_note_path(user, cohort))
+
+
+def get_blob_hashes():
+    # 工作区中未修改文件的 git blob 哈希 {路径: sha}，用作增量构建缓存的键
+    try:
+        staged = subprocess.check_output(
+            ['git', 'ls-files', '-s', '-z'], stderr=subprocess.DEVNULL).decode('utf-8')
+        modified = subprocess.check_output(
+            ['git', 'ls-files', '-m', '-z'], stderr=subprocess.DEVNULL).decode('utf-8')
+    except (OSError, subprocess.CalledProcessError):
+        logging.warning("Failed to list git blob hashes, cache disabled")
+        return {}
+    dirty = set(modified.split('\0'))
+    blob_hashes = {}
+    for entry in staged.split('\0'):
+        if not entry:
+            continue
+        info, path = entry.split('\t', 1)
+        if path not in dirty:
+            blob_hashes[path] = info.split()[1]
+    return blob_hashes
+
+
+# 一次流式 git log 读取所有参与者笔记的提交时间：{路径: [提交时间戳]}，失败时返回 None
+# paths 不为空时只读取这些文件的历史。使用作者时间（%at）：rebase 合并 PR 时提交者时间会变成
+# 合并时间，作者时间保持不变。squash 合并把一个 PR 的多次提交合成一个提交、只剩一个时间，
+# 所以校验提交时间时 PR 需要用 merge 或 rebase 合并
+def load_commit_times(cohorts, paths=None):
+    pathspecs = sorted(paths or {os.path.join(cohort.directory, f"*{cohort.file_suffix}")
+                                 for cohort in cohorts})
+    command = ['git', '-c', 'core.quotepath=off', 'log', '--relative', '--name-only',
+               '--no-renames', '--format=%x00%at', '--'] + pathspecs
+    commit_times = {}
+    try:
+        with subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                              encoding='utf-8') as process:
+            timestamp = None
+            for line in process.stdout:
+                line = line.rstrip('\n')
+                if line.startswith('\0'):
+                    timestamp = int(line[1:])
+                elif line and timestamp is not None:
+                    commit_times.setdefault(os.path.normpath(line), []).append(timestamp)
+    except (OSError, ValueError) as e:
+        logging.warning(f"Failed to read commit history: {str(e)}")
+        return None
+    if process.returncode != 0:
+        logging.warning("Failed to read commit history, commit verification disabled")
+        return None
+    logging.info(f"Loaded commit history for {len(commit_times)} note files")
+    return commit_times
+
+
+# 提交时间换算成用户当地日期，只保留共学期内的日期
+def get_commit_days(commit_times, user_tz, cohort):
+    day_index = get_cohort_calendar(cohort.start_date, cohort.end_date).day_index
+    return {date for date in (datetime.fromtimestamp(timestamp, user_tz).date()
+                              for timestamp in set(commit_times))
+            if date in day_index}
+
+
+# 与 read_note() 相同的解析结果，保存为 StatusCache 的笔记缓存项
+def parse_note_content(file_content):
+    return {'timezone': str(get_user_timezone(file_content)),
+            'headings': [[*key, length] for key, length in scan_note_entries(file_content)]}
+
+
+# 笔记昵称与 fork 所有者的登录名相同（不区分大小写），或主仓库中最先添加这份笔记的 PR
+# 由 fork 所有者提交时，笔记属于该 fork。主仓库中还没有的新笔记只能按昵称认领。
+# authors 缓存 get_author(文件名) 的结果，同一笔记出现在多个 fork 中时只查询一次
+def is_fork_note_owner(login, filename, cohorts, files, authors, get_author):
+    directory, name = os.path.split(os.path.normpath(filename))
+    for cohort in cohorts:
+        if name.lower().endswith(cohort.file_suffix.lower()):
+            if name[:-len(cohort.file_suffix)].lower() == login.lower():
+                return True
+            break
+    if name not in files.get(directory or '.', []):
+        return False
+    if filename not in authors:
+        authors[filename] = get_author(filename)
+    return (authors[filename] or '').lower() == login.lower()
+
+
+# 各 fork 相对主仓库修改或新增的笔记：按 blob 解析后放入 cache，并加入 files，
+# 之后与仓库中的笔记走同一条计算流程。fork 中的内容未经 PR 审核，只采用属于 fork 所有者的笔记
+# （见 is_fork_note_owner），其余沿用主仓库中的版本；同一笔记有多个可信的 fork 时采用最近推送的。
+# 提交时间校验只覆盖主仓库的提交历史
+def load_fork_notes(cohorts, files, cache):
+    owner, repo = get_repo_info()
+    if not owner or not repo:
+        logging.error("Failed to get repository information, skipping fork notes")
+        return 0
+    import github_api
+    client = github_api.get_client()
+    # 整个读取过程共用一个时限，API 变慢时剩余的 fork 沿用缓存或仓库中的笔记
+    deadline = time.monotonic() + github_api.GITHUB_API_DEADLINE
+    with profiler.stage('api'):
+        repo_data = client.get_json(f"/repos/{owner}/{repo}", deadline)
+        forks = [fork for fork in client.list_forks(owner, repo, deadline)
+                 if (fork.get('pushed_at') or '') > (fork.get('created_at') or '')]
+        if not repo_data or not forks:
+            return 0
+        forks.sort(key=lambda fork: fork['pushed_at'], reverse=True)
+        base = repo_data.get('default_branch', 'main')
+        comparisons = client.fetch_all([
+            f"/repos/{owner}/{repo}/compare/{base}...{fork['owner']['login']}:{fork['default_branch']}"
+            for fork in forks], deadline=deadline)
+
+    directories = {}
+    for cohort in cohorts:
+        directories.setdefault(os.path.normpath(cohort.directory), []).append(cohort)
+    notes = {}
+    authors = {}
+    rejected = set()
+    for fork, comparison in zip(forks, comparisons):
+        login = fork['owner']['login']
+        for entry in (comparison or {}).get('files', []):
+            path = os.path.normpath(entry['filename'])
+            directory, name = os.path.split(path)
+            note_cohorts = directories.get(directory or '.', [])
+            if (entry.get('status') == 'removed' or path in notes
+                    or not is_note_file(name, note_cohorts)
+                    or cache.blob_hashes.get(path) == entry['sha']):
+                continue
+            if not is_fork_note_owner(login, entry['filename'], note_cohorts, files, authors,
+                                      lambda filename: client.get_file_author(
+                                          owner, repo, filename, deadline)):
+                rejected.add(f"{path} ({login})")
+                continue
+            notes[path] = entry
+    if rejected:
+        logging.warning(f"Ignoring {len(rejected)} fork notes not owned by the fork owner: "
+                        f"{', '.join(sorted(rejected))}")
+
+    missing = [(path, entry) for path, entry in notes.items() if not cache.get_note(entry['sha'])]
+    with profiler.stage('api'):
+        contents = client.fetch_all([entry['contents_url'] for _, entry in missing], raw=True,
+                                    deadline=deadline)
+    skipped = set()
+    for (path, entry), content in zip(missing, contents):
+        if content is None:
+            continue
+        try:
+            cache.new_notes[entry['sha']] = parse_note_content(content)
+        except NoteOverBudget as e:
+            logging.warning(f"{path} (fork): {SKIPPED_STATUS} ({str(e)})")
+            skipped.add(path)
+    count = 0
+    for path, entry in notes.items():
+        if not cache.get_note(entry['sha']):
+            if path not in skipped:
+                logging.warning(f"Failed to fetch {path} from forks")
+            continue
+        cache.blob_hashes[path] = entry['sha']
+        directory, name = os.path.split(path)
+        names = files.setdefault(directory or '.', [])
+        if name not in names:
+            names.append(name)
+        count += 1
+    logging.info(f"Loaded {count} unmerged notes from {len(forks)} forks "
+                 f"({len(missing)} downloaded)")
+    return count
+
+
+def get_cohort_key(cohort):
+    return f"{cohort.name}|{cohort.start_date.isoformat()}|{cohort.end_date.isoformat()}|{cohort.file_suffix}|{cohort.directory}"
+
+
+class StatusCache:
+    # 增量构建缓存：notes 以 git blob 为键，保存时区和与日期窗口无关的标题解析结果，各期共享；
+    # rows 按共学期配置分组，保存每个用户的 blob、当地日期和表格格子
+    # commit_times 为 load_commit_times() 的结果，None 表示不校验提交时间；
+    # snapshots 为历史快照库，None 表示不封存；recompute 为 True 时不沿用 README 中已淘汰用户的行
+    def __init__(self, blob_hashes=None, notes=None, rows=None):
+        self.blob_hashes = blob_hashes or {}
+        self.commit_times = None
+        self.snapshots = None
+        self.recompute = False
+        self.notes = notes or {}
+        self.rows = rows or {}
+        self.new_notes = {}
+        self.new_rows = {}
+
+    @classmethod
+    def load(cls, with_blobs=False):
+        # with_blobs：未启用缓存文件时也读取 blob 哈希，让本次运行的多期共享解析结果
+        if not STATUS_CACHE_FILE:
+            if not with_blobs:
+                return cls()
+            with profiler.stage('discovery'):
+                return cls(get_blob_hashes())
+        data = {}
+        try:
+            with open(STATUS_CACHE_FILE, 'r', encoding='utf-8') as file:
+                data = json.load(file)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            logging.warning(f"Ignoring unreadable status cache: {str(e)}")
+        if data.get('version') != STATUS_CACHE_VERSION:
+            data = {}
+        with profiler.stage('discovery'):
+            blob_hashes = get_blob_hashes()
+        return cls(blob_hashes, data.get('notes'), data.get('cohorts'))
+
+    def get_note(self, blob):
+        if not blob:
+            return None
+        return self.new_notes.get(blob) or self.notes.get(blob)
+
+    def get_row(self, cohort, user):
+        return self.rows.get(get_cohort_key(cohort), {}).get(user)
+
+    def update(self, cohort, user, blob, row_entry, note_entry):
+        if not blob:
+            return
+        if note_entry:
+            self.new_notes[blob] = note_entry
+        if row_entry:
+            self.new_rows.setdefault(get_cohort_key(cohort), {})[user] = row_entry
+
+    # 常驻模式每批处理后调用：只保留本批用到的条目，旧的解析结果不会无限累积
+    def rotate(self):
+        self.notes, self.rows = self.new_notes, self.new_rows
+        self.new_notes, self.new_rows = {}, {}
+
+    def save(self):
+        if not STATUS_CACHE_FILE:
+            return
+        try:
+            with open(STATUS_CACHE_FILE, 'w', encoding='utf-8') as file:
+                json.dump({'version': STATUS_CACHE_VERSION, 'notes': self.new_notes,
+                           'cohorts': self.new_rows}, file, ensure_ascii=False)
+        except OSError as e:
+            logging.warning(f"Failed to write status cache: {str(e)}")
 
 
-def get_all_user_files():
-    exclude_prefixes = ('template', 'readme')
-    return [f[:-len(FILE_SUFFIX)] for f in os.listdir('.')
-            if f.lower().endswith(FILE_SUFFIX.lower())
-            and not f.lower().startswith(exclude_prefixes)]
+def load_snapshot_store():
+    if not STATUS_SNAPSHOT_FILE:
+        return None
+    import snapshot_store
+    return snapshot_store.open_snapshot_store(STATUS_SNAPSHOT_FILE)
 
 
-def file_exists(user):
-    return os.path.exists(f"{user}{FILE_SUFFIX}")
+# 尚未封存的日期；OPEN_DAY 出现在表格中（未被隐藏、也不在淘汰之后）时必须读取笔记
+OPEN_DAY = len(CELL_TEXT)
 
 
-def update_readme(content):
+# 已封存的日期足以确定整行（共学期已结束，或在已封存的日期中被淘汰）时不再读取笔记，否则返回 None
+def generate_sealed_user_row(user, cohort, timezone, days):
+    user_tz = resolve_timezone(timezone) if timezone else None
+    if user_tz is None:
+        return None
+    calendar = get_cohort_calendar(cohort.start_date, cohort.end_date)
+    statuses = array('B', (CELL_CODES[days[key]] if key in days else OPEN_DAY
+                           for key in (date.isoformat() for date in calendar.dates)))
+    cells = evaluate_elimination(statuses, calendar, get_local_today(user_tz))
+    if OPEN_DAY in cells:
+        return None
+    return make_table_row(user, cells, timezone)
+
+
+def generate_cached_user_row(user, cohort, blob, cached_row, cached_note, commit_times=None,
+                             sealed=None):
+    # 文件 blob 未变化时复用缓存的解析结果；当地日期和提交日期也未变化时直接复用整行
+    # sealed 为快照库中该用户的 (时区, {日期: 状态})，None 表示未启用快照库
+    # 返回 (TableRow, 行缓存项, 笔记缓存项, 本次新封存的 {日期: 状态})，
+    # 只依赖参数和文件内容，可在子进程中执行。笔记超出预算时 TableRow 为 None，不缓存也不封存
+    if sealed is not None:
+        row = generate_sealed_user_row(user, cohort, *sealed)
+        if row is not None:
+            return row, cached_row, cached_note, {}
+    if cached_note:
+        user_tz = resolve_timezone(cached_note['timezone'])
+        entries = None
+    else:
+        path = get_note_path(user, cohort)
+        start = time.perf_counter()
+        try:
+            user_tz, entries = read_note(path)
+        except NoteOverBudget as e:
+            logging.warning(f"{path}: {SKIPPED_STATUS} ({str(e)})")
+            profiler.add('skipped', time.perf_counter() - start)
+            return None, None, None, {}
+        if blob:
+            cached_note = {'timezone': str(user_tz),
+                           'headings': [[*key, length] for key, length in entries]}
+    local_today = get_local_today(user_tz)
+    today = local_today.date().isoformat()
+    commit_days = None
+    verified = None
+    if commit_times is not None:
+        commit_days = get_commit_days(commit_times, user_tz, cohort)
+        verified = sorted(date.isoformat() for date in commit_days)
+    calendar = get_cohort_calendar(cohort.start_date, cohort.end_date)
+    sealed_days = sealed[1] if sealed else {}
+    # 启用快照库时，有已经过去但尚未封存的日期就必须重新计算，才能把它们封存下来
+    pending = [] if sealed is None else [
+        i for i, (date, kind) in enumerate(zip(calendar.dates, get_zone_days(calendar, local_today).kinds))
+        if kind == DAY_PAST and date.isoformat() not in sealed_days]
+    if (cached_row and cached_row['blob'] == blob and cached_row['today'] == today
+            and cached_row.get('verified') == verified and not pending):
+        cells = array('B', map(int, cached_row['cells']))
+        return make_table_row(user, cells, str(user_tz)), cached_row, cached_note, {}
+    if entries is None:
+        entries = [((year, month, day), length)
+                   for year, month, day, length in cached_note['headings']]
+    with profiler.stage('headings'):
+        entry_index = index_note_entries(entries, cohort)
+    with profiler.stage('status'):
+        statuses = get_user_statuses(user, (user_tz, entry_index), cohort, commit_days, sealed_days)
+        cells = evaluate_elimination(statuses, calendar, local_today)
+    row_entry = {'blob': blob, 'today': today, 'cells': ''.join(map(str, cells))} if blob else None
+    if row_entry and verified is not None:
+        row_entry['verified'] = verified
+    with profiler.stage('render'):
+        row = make_table_row(user, cells, str(user_tz))
+    return row, row_entry, cached_note, {calendar.dates[i].isoformat(): CELL_TEXT[statuses[i]]
+                                         for i in pending}
+
+
+def generate_timed_user_row(user, cohort, blob, cached_row, cached_note, commit_times=None,
+                            sealed=None):
+    start = time.perf_counter()
+    result = generate_cached_user_row(user, cohort, blob, cached_row, cached_note, commit_times,
+                                      sealed)
+    profiler.add_file(get_note_path(user, cohort), time.perf_counter() - start)
+    return result
+
+
+def generate_profiled_user_row(*args):
+    # 子进程中的 profiler 与主进程相互独立：逐行统计后随结果返回，由主进程合并
+    profiler.reset(enabled=True)
+    return generate_timed_user_row(*args), profiler.snapshot()
+
+
+def get_worker_count():
+    if SYNC_WORKERS.lower() == 'auto':
+        return os.cpu_count() or 1
     try:
+        return max(1, int(SYNC_WORKERS))
+    except ValueError:
+        logging.warning(f"Invalid SYNC_WORKERS: {SYNC_WORKERS}. Running serially.")
+        return 1
+
+
+def generate_user_rows(users, cohort, cache):
+    # 按 users 顺序返回 TableRow；并行模式下 map 保证输出顺序与串行一致
+    blobs = [cache.blob_hashes.get(get_note_path(user, cohort)) for user in users]
+    cached_rows = [cache.get_row(cohort, user) for user in users]
+    cached_notes = [cache.get_note(blob) for blob in blobs]
+    if cache.commit_times is None:
+        commit_times = repeat(None)
+    else:
+        commit_times = [cache.commit_times.get(get_note_path(user, cohort), []) for user in users]
+    if cache.snapshots is None:
+        sealed = repeat(None)
+    else:
+        with profiler.stage('snapshots'):
+            snapshots = cache.snapshots.load(get_cohort_key(cohort))
+        sealed = [snapshots.get(user, (None, {})) for user in users]
+    args = (users, repeat(cohort), blobs, cached_rows, cached_notes, commit_times, sealed)
+    workers = min(get_worker_count(), len(users))
+    if workers > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        chunksize = max(1, len(users) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            if profiler.enabled:
+                results = []
+                for result, snapshot in executor.map(
+                        generate_profiled_user_row, *args, chunksize=chunksize):
+                    profiler.merge(snapshot)
+                    results.append(result)
+            else:
+                results = list(executor.map(
+                    generate_cached_user_row, *args, chunksize=chunksize))
+    else:
+        results = list(map(generate_timed_user_row, *args))
+
+    reused = sum(1 for note in cached_notes if note)
+    logging.info(f"Status cache: reused {reused} of {len(users)} parsed notes")
+    skipped = sum(1 for row, _, _, _ in results if row is None)
+    if skipped:
+        logging.warning(f"{skipped} of {len(users)} notes {SKIPPED_STATUS}")
+    for user, blob, (_, row_entry, note_entry, _) in zip(users, blobs, results):
+        cache.update(cohort, user, blob, row_entry, note_entry)
+    if cache.snapshots is not None:
+        with profiler.stage('snapshots'):
+            cache.snapshots.seal(get_cohort_key(cohort), [
+                (user, row.timezone, days) for user, (row, _, _, days) in zip(users, results)
+                if row is not None])
+    return [row for row, _, _, _ in results]
+
+
+# timezone 只在本次运行生成的行上有值，从 README 解析出的行为 None
+TableRow = namedtuple('TableRow', ['user', 'statuses', 'line', 'timezone'], defaults=(None,))
+
+
+def parse_table_row(line):
+    match = TABLE_ROW_PATTERN.match(line)
+    if not match:
+        return TableRow(None, [], line)
+    # 去掉首尾的空元素
+    statuses = [status.strip() for status in line.split('|')[2:-1]]
+    return TableRow(match.group(1).strip(), statuses, line)
+
+
+# 从行文本还原每个格子的状态码：按 CELL_RENDER 的写法，当天还没有内容（CELL_PENDING）比空格子
+# 多两个空格，strip 后的 statuses 无法区分二者。无法识别的格子为 None
+def get_row_cells(line):
+    cells = []
+    for cell in line.split('|')[2:-1]:
+        if len(cell) > 1 and cell[0] == ' ' and cell[-1] == ' ' and cell[1:-1] in CELL_CODES:
+            cells.append(CELL_CODES[cell[1:-1]])
+        else:
+            cells.append(CELL_CODES.get(cell.strip()))
+    return cells
+
+
+# cells 为 evaluate_elimination() 返回的状态码
+def make_table_row(user, cells, timezone=None):
+    return TableRow(user, [CELL_STRIPPED[cell] for cell in cells],
+                    render_user_row(user, cells), timezone)
+
+
+class StatusTable:
+    # README 中 TABLE_START_MARKER 与 TABLE_END_MARKER 之间的打卡表：每次运行只解析一次，
+    # 统计、行复用和渲染都基于这个内存模型
+    def __init__(self, header, separator, rows):
+        self.header = header
+        self.separator = separator
+        self.rows = rows
+
+    @classmethod
+    def parse(cls, content):
         start_index = content.find(TABLE_START_MARKER)
         end_index = content.find(TABLE_END_MARKER)
         if start_index == -1 or end_index == -1:
+            return None
+        lines = content[start_index +
+                        len(TABLE_START_MARKER):end_index].strip().split('\n')
+        header = lines[0]
+        separator = lines[1] if len(lines) > 1 else ''
+        return cls(header, separator, [parse_table_row(line) for line in lines[2:]])
+
+    @classmethod
+    def for_date_range(cls, rows, cohort=None):
+        cohort = cohort or get_default_cohort()
+        dates = get_date_range(cohort)
+        header = f'| {cohort.field_name} | ' + ' | '.join(date.strftime("%m.%d").lstrip('0')
+                                                  for date in dates) + ' |'
+        separator = '| ------------- | ' + ' | '.join(['----' for _ in dates]) + ' |'
+        return cls(header, separator, rows)
+
+    # 渲染从 TABLE_START_MARKER 到 TABLE_END_MARKER（含）的整段文本
+    def render(self):
+        return '\n'.join([TABLE_START_MARKER, self.header, self.separator]
+                         + [row.line for row in self.rows] + [TABLE_END_MARKER])
+
+    def splice(self, content):
+        start_index = content.find(TABLE_START_MARKER)
+        end_index = content.find(TABLE_END_MARKER)
+        return content[:start_index] + self.render() + content[end_index + len(TABLE_END_MARKER):]
+
+
+# 返回新的 StatusTable；找不到表格或出错时返回 None
+# cache 和 files 由 main 在多期之间共享，单独调用时按需创建
+def update_status_table(content, cohort=None, cache=None, files=None, pages=None):
+    cohort = cohort or get_default_cohort()
+    try:
+        table = load_status_table(content, cohort, pages)
+        if table is None:
             logging.error(
                 "Error: Couldn't find the table markers in README.md")
-            return content
-
-        new_table = [
-            f'{TABLE_START_MARKER}\n',
-            f'| {FIELD_NAME} | ' + ' | '.join(date.strftime("%m.%d").lstrip('0')
-                                              for date in get_date_range()) + ' |\n',
-            '| ------------- | ' +
-            ' | '.join(['----' for _ in get_date_range()]) + ' |\n'
-        ]
+            return None
 
+        if files is None:
+            with profiler.stage('discovery'):
+                files = discover_note_files([cohort])
+        note_files = set(files.get(os.path.normpath(cohort.directory), []))
         existing_users = set()
-        table_rows = content[start_index +
-                             len(TABLE_START_MARKER):end_index].strip().split('\n')[2:]
-        for row in table_rows:
-            match = re.match(r'\|\s*([^|]+)\s*\|', row)
-            if match:
-                display_name = match.group(1).strip()
-                if display_name and file_exists(display_name):
+        users = []
+        for row in table.rows:
+            if row.user is not None:
+                display_name = row.user
+                if display_name and f"{display_name}{cohort.file_suffix}" in note_files:
                     existing_users.add(display_name)
-                    new_table.append(generate_user_row(display_name))
+                    users.append(display_name)
                 else:
                     logging.warning(
                         f"Removing user {display_name} due to missing file")
             else:
-                logging.warning(f"Skipping invalid row: {row}")
+                logging.warning(f"Skipping invalid row: {row.line}")
 
-        new_users = set(get_all_user_files()) - existing_users
+        new_users = sorted(set(get_all_user_files(cohort, files)) - existing_users)
         for user in new_users:
-            if user.strip() and file_exists(user):
-                new_table.append(generate_user_row(user))
+            if user.strip() and f"{user}{cohort.file_suffix}" in note_files:
+                users.append(user)
                 logging.info(f"Added new user: {user}")
             else:
                 logging.warning(
                     f"Skipping user '{user}' due to empty name or missing file")
 
-        new_table.append(f'{TABLE_END_MARKER}\n')
-        return content[:start_index] + ''.join(new_table) + content[end_index + len(TABLE_END_MARKER):]
+        own_cache = cache is None
+        if own_cache:
+            cache = StatusCache.load()
+        frozen = get_frozen_rows(table, cohort, cache)
+        active_users = [user for user in users if user not in frozen]
+        generated = iter(generate_user_rows(active_users, cohort, cache))
+        rows = [frozen[user] if user in frozen else next(generated) for user in users]
+        rows = keep_skipped_rows(table, users, rows, cohort)
+        rows = fill_row_timezones(rows, cohort, cache)
+        if own_cache:
+            cache.save()
+        return StatusTable.for_date_range(reuse_unchanged_rows(table, rows), cohort)
 
     except Exception as e:
         logging.error(f"Error in update_readme: {str(e)}")
-        return content
+        return None
+
+
+# 在本周之前就已被淘汰（❌）的用户，之后的格子不会再变化：直接沿用 README 中的原行，
+# 不再读取笔记。“本周”按最西的时区（UTC-12）计算，保证所有参与者的这一周都已结束；
+# 表头（日期范围）变化时不沿用。沿用后补写的笔记或事后合并的 PR 不再改变这些行，
+# 所以只在 STATUS_FREEZE_ELIMINATED 开启时沿用，render --recompute 时重新生成
+def get_frozen_rows(table, cohort, cache=None):
+    if not STATUS_FREEZE_ELIMINATED or (cache is not None and cache.recompute):
+        return {}
+    new_table = StatusTable.for_date_range([], cohort)
+    if table.header != new_table.header:
+        return {}
+    calendar = get_cohort_calendar(cohort.start_date, cohort.end_date)
+    current_week = (datetime.now(pytz.UTC) - timedelta(hours=12)).date().isocalendar()[:2]
+    frozen = {}
+    for row in table.rows:
+        if row.user is None or len(row.statuses) != len(calendar) or "❌" not in row.statuses:
+            continue
+        if calendar.week_ids[row.statuses.index("❌")] < current_week:
+            frozen[row.user] = row
+    if frozen:
+        logging.info(f"Reusing {len(frozen)} rows of users eliminated before this week")
+    return frozen
+
+
+# 笔记超出预算而跳过（行为 None）的用户沿用 README 中的原行，新用户先放一行空格子
+def keep_skipped_rows(table, users, rows, cohort):
+    if None not in rows:
+        return rows
+    existing = {row.user: row for row in table.rows if row.user is not None}
+    calendar = get_cohort_calendar(cohort.start_date, cohort.end_date)
+    return [row or existing.get(user) or make_table_row(user, array('B', [CELL_NONE]) * len(calendar))
+            for user, row in zip(users, rows)]
+
+
+# 沿用 README 原行（已淘汰或超出预算）的用户没有时区：优先取缓存的笔记解析结果，
+# 否则只读取笔记的 front matter，导出的时区列与新生成的行一致
+def fill_row_timezones(rows, cohort, cache):
+    result = []
+    for row in rows:
+        if row.user is not None and row.timezone is None:
+            path = get_note_path(row.user, cohort)
+            note = cache.get_note(cache.blob_hashes.get(path))
+            row = row._replace(timezone=note['timezone'] if note else read_note_timezone(path))
+        result.append(row)
+    return result
+
+
+# 新生成的行与 README 中同一用户的原行比较，各格状态都相同时沿用原行的文本（包括手工调整过的
+# 空白和对齐），只有状态变化的行才重写。按格子状态码比较，当天还没有内容与空格子视为不同
+def reuse_unchanged_rows(table, rows):
+    existing = {row.user: row for row in table.rows if row.user is not None}
+    result = []
+    changed = 0
+    for row in rows:
+        old_row = existing.get(row.user)
+        if old_row is not None and get_row_cells(old_row.line) == get_row_cells(row.line):
+            result.append(old_row if row.timezone is None else old_row._replace(timezone=row.timezone))
+        else:
+            result.append(row)
+            changed += 1
+    logging.info(f"{changed} of {len(rows)} table rows changed")
+    return result
 
 
-def generate_user_row(user):
-    user_status = get_user_study_status(user)
-    with open(f"{user}{FILE_SUFFIX}", 'r', encoding='utf-8') as file:
-        file_content = file.read()
-    user_tz = get_user_timezone(file_content)
-    new_row = f"| {user} |"
+def update_readme(content, cohort=None):
+    table = update_status_table(content, cohort)
+    return table.splice(content) if table else content
+
+
+def generate_user_row(user, note=None, cohort=None, commit_days=None):
+    return render_user_row(user, generate_user_cells(user, note, cohort, commit_days)) + '\n'
+
+
+def render_user_row(user, cells):
+    return f"| {user} |" + ''.join(CELL_RENDER[cell] for cell in cells)
+
+
+def generate_user_cells(user, note=None, cohort=None, commit_days=None):
+    cohort = cohort or get_default_cohort()
+    note = note or load_user_note(user, cohort)
+    with profiler.stage('status'):
+        statuses = get_user_statuses(user, note, cohort, commit_days)
+        user_current_day = get_local_today(note[0])
+        calendar = get_cohort_calendar(cohort.start_date, cohort.end_date)
+        return evaluate_elimination(statuses, calendar, user_current_day)
+
+
+# 按共学日历排列的每日状态码（淘汰判定之前），sealed 中已封存的日期直接沿用
+def get_user_statuses(user, note, cohort, commit_days=None, sealed=None):
+    statuses = get_user_study_status(user, note, cohort, commit_days)
+    calendar = get_cohort_calendar(cohort.start_date, cohort.end_date)
+    for i in calendar.unaligned:
+        statuses[i] = CELL_EMPTY
+    if sealed:
+        for i, date in enumerate(calendar.dates):
+            status = sealed.get(date.isoformat())
+            if status is not None:
+                statuses[i] = CELL_CODES[status]
+    return statuses
+
+
+# 单次遍历：按 ISO 周累计缺勤，同一周缺勤超过 MAX_WEEKLY_ABSENCES 次即淘汰，之后的格子留空（None）
+def evaluate_elimination(statuses, calendar, user_current_day):
+    cells = array('B', bytes(len(statuses)))
     is_eliminated = False
     absent_count = 0
     current_week = None
-
-    user_current_day = datetime.now(user_tz).replace(
-        hour=0, minute=0, second=0, microsecond=0)
-    for date in get_date_range():
-        # 获取用户时区和当地时间进行比较，如果用户打卡时间大于当地时间，则不显示- timedelta(days=1)
-        user_datetime = date.astimezone(pytz.UTC).replace(
-            hour=0, minute=0, second=0, microsecond=0)
-        if is_eliminated or (user_datetime > user_current_day and user_datetime.day > user_current_day.day):
-            new_row += " |"
-        else:
-            user_date = user_datetime
-            # 检查是否是新的一周
-            week = user_date.isocalendar()[1]  # 获取ISO日历周数
-            if week != current_week:
-                current_week = week
-                absent_count = 0  # 重置缺勤计数
-
-            status = user_status.get(user_date, "")
-
-            if status == "⭕️":
-                absent_count += 1
-                if absent_count > 2:
-                    is_eliminated = True
-                    new_row += " ❌ |"
-                else:
-                    new_row += " ⭕️ |"
+    hidden = get_zone_days(calendar, user_current_day).hidden
+    for i, (is_hidden, week, status) in enumerate(zip(hidden, calendar.week_ids, statuses)):
+        # 获取用户时区和当地时间进行比较，如果用户打卡时间大于当地时间，则不显示（CELL_NONE）
+        if is_eliminated or is_hidden:
+            continue
+        if week != current_week:
+            current_week = week
+            absent_count = 0  # 新的一周，重置缺勤计数
+
+        if status == CELL_ABSENT:
+            absent_count += 1
+            if absent_count > MAX_WEEKLY_ABSENCES:
+                is_eliminated = True
+                cells[i] = CELL_ELIMINATED
             else:
-                new_row += f" {status} |"
-
-    return new_row + '\n'
+                cells[i] = CELL_ABSENT
+        else:
+            cells[i] = status
+    return cells
 
 
 def get_repo_info():
@@ -353,29 +1352,23 @@ def get_fork_count():
         logging.error("Failed to get repository information")
         return None
 
-    api_url = f"https://api.github.com/repos/{owner}/{repo}"
-
-    try:
-        response = requests.get(api_url)
-        response.raise_for_status()
-        repo_data = response.json()
-        return repo_data['forks_count']
-    except requests.RequestException as e:
-        logging.error(f"Error fetching fork count: {e}")
+    import github_api
+    with profiler.stage('api'):
+        repo_data = github_api.get_client().get_json(f"/repos/{owner}/{repo}")
+    if not repo_data or 'forks_count' not in repo_data:
+        logging.error("Error fetching fork count")
         return None
+    return repo_data['forks_count']
 
 
-def calculate_statistics(content):
-    start_index = content.find(TABLE_START_MARKER)
-    end_index = content.find(TABLE_END_MARKER)
-    if start_index == -1 or end_index == -1:
+def calculate_statistics(content, table=None):
+    if table is None:
+        table = StatusTable.parse(content)
+    if table is None:
         logging.error("Error: Couldn't find the table markers in README.md")
         return None
 
-    table_content = content[start_index +
-                            len(TABLE_START_MARKER):end_index].strip()
-    rows = table_content.split('\n')[2:]  # Skip header and separator rows
-
+    rows = [row for row in table.rows if row.user is not None]
     total_participants = len(rows)
     eliminated_participants = 0
     completed_participants = 0
@@ -383,9 +1376,8 @@ def calculate_statistics(content):
     completed_users = []
 
     for row in rows:
-        user_name = row.split('|')[1].strip()
-        # Exclude first and last empty elements
-        statuses = [status.strip() for status in row.split('|')[2:-1]]
+        user_name = row.user
+        statuses = row.statuses
 
         if '❌' in statuses:
             eliminated_participants += 1
@@ -412,7 +1404,549 @@ def calculate_statistics(content):
     }
 
 
-def main():
+def format_statistics(stats):
+    return (f"\n\n## 统计数据\n\n"
+            f"- 总参与人数: {stats['total_participants']}\n"
+            f"- 完成人数: {stats['completed_participants']}\n"
+            f"- 完成用户: {', '.join(stats['completed_users'])}\n"
+            f"- 全勤用户: {', '.join(stats['perfect_attendance_users'])}\n"
+            f"- 淘汰人数: {stats['eliminated_participants']}\n"
+            f"- 淘汰率: {stats['elimination_rate']:.2f}%\n"
+            f"- Fork人数: {stats['fork_count']}\n")
+
+
+# 在用户 × 日期的状态矩阵上计算的统计，见 analytics.compute_analytics()
+def calculate_analytics(table, cohort):
+    import analytics
+    calendar = get_cohort_calendar(cohort.start_date, cohort.end_date)
+    rows = [row for row in table.rows if row.user is not None]
+    matrix = analytics.build_status_matrix([row.statuses for row in rows], len(calendar))
+    result = analytics.compute_analytics(
+        matrix, len(calendar), calendar.week_ids, MAX_WEEKLY_ABSENCES + 2)
+    result['users'] = [row.user for row in rows]
+    return result
+
+
+def format_analytics(result, cohort):
+    import analytics
+    calendar = get_cohort_calendar(cohort.start_date, cohort.end_date)
+    labels = [date.strftime("%m.%d").lstrip('0') for date in calendar.days]
+    total = len(result['users'])
+    lines = ["", "## 每日打卡", "", "| 日期 | 打卡率 | 淘汰人数 | 留存率 |", "| ---- | ---- | ---- | ---- |"]
+    for label, (done, evaluated, eliminated, alive) in zip(labels, result['daily']):
+        if evaluated:
+            lines.append(f"| {label} | {done / evaluated * 100:.2f}% | {eliminated} "
+                         f"| {alive / total * 100:.2f}% |")
+
+    bins = MAX_WEEKLY_ABSENCES + 2
+    lines += ["", "## 每周缺勤分布", "",
+              "| 周 | " + " | ".join(f"缺勤 {i} 次" for i in range(bins - 1)) + f" | 缺勤 {bins - 1} 次及以上 |",
+              "| ---- |" + " ---- |" * bins]
+    for (start, end), histogram in zip(analytics.get_week_spans(calendar.week_ids), result['weekly']):
+        if any(histogram):
+            lines.append(f"| {labels[start]} - {labels[end - 1]} | "
+                         + " | ".join(str(count) for count in histogram) + " |")
+
+    eliminated_on = [day for day in result['eliminated_on'] if day is not None]
+    lines += ["", "## 连续打卡", ""]
+    if eliminated_on:
+        lines.append(f"- 平均淘汰于第 {sum(eliminated_on) / len(eliminated_on) + 1:.1f} 天")
+    ranking = sorted(zip(result['users'], result['streaks']),
+                     key=lambda item: (-item[1][0], -item[1][1]))
+    for user, (longest, current) in ranking[:TOP_STREAKS]:
+        if longest:
+            lines.append(f"- {user}: 最长 {longest} 天，当前 {current} 天")
+    return '\n'.join(lines) + '\n'
+
+
+# 一次扫描定位 README 中所有标记的首次出现位置 {标记: 下标}
+def find_readme_markers(content):
+    markers = {}
+    for match in README_MARKER_PATTERN.finditer(content):
+        markers.setdefault(match.group(), match.start())
+    return markers
+
+
+# replacements: [(start, end, text)]，把 content[start:end] 替换为 text。
+# 内容没有变化时不写文件；否则分段写入同目录的临时文件，再用 os.replace 原子替换
+def write_readme(path, content, replacements):
+    changes = [(start, end, text) for start, end, text in sorted(replacements)
+               if content[start:end] != text]
+    if not changes:
+        return False
+    fd, temp_path = tempfile.mkstemp(
+        dir=os.path.dirname(os.path.abspath(path)), prefix='.README.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as file:
+            position = 0
+            for start, end, text in changes:
+                file.write(content[position:start])
+                file.write(text)
+                position = end
+            file.write(content[position:])
+        os.chmod(temp_path, os.stat(path).st_mode & 0o777)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+    return True
+
+
+UserCheck = namedtuple('UserCheck', ['user', 'timezone', 'cohort', 'days'])
+# status 与表格格子相同：✅、⭕️、❌，' ' 为当天还没有内容，None 为未到日期或已淘汰；
+# weekly_absences 为截至这一天本周累计的缺勤次数
+DayCheck = namedtuple('DayCheck', ['date', 'heading', 'content_length', 'status',
+                                   'weekly_absences', 'eliminated'])
+
+
+# 单个用户的快速检查：只读取这一份笔记，不读 README、不访问网络。规则与 generate_user_row
+# 相同（用户时区、当天、每周缺勤淘汰），dates 为 None 时返回整个共学期；
+# commit_times 为该笔记的提交时间戳列表，传入时同时校验提交日期
+def check_user(user, dates=None, cohort=None, commit_times=None):
+    cohort = cohort or get_default_cohort()
+    user_tz, _, note_headings = scan_note_file(get_note_path(user, cohort))
+    lookup = get_date_heading_lookup(cohort.start_date, cohort.end_date)
+    headings = {}
+    for heading, length in note_headings:
+        for key, extra in heading.keys:
+            for date in lookup.get(key, ()):
+                headings.setdefault(date, (heading.text.strip(), length + extra))
+    entry_index = {date: length for date, (_, length) in headings.items()}
+    commit_days = None
+    if commit_times is not None:
+        commit_days = get_commit_days(commit_times, user_tz, cohort)
+    cells = generate_user_cells(user, (user_tz, entry_index), cohort, commit_days)
+
+    calendar = get_cohort_calendar(cohort.start_date, cohort.end_date)
+    wanted = None if dates is None else set(dates)
+    days = []
+    current_week = None
+    absences = 0
+    eliminated = False
+    for date, week, cell in zip(calendar.dates, calendar.week_ids, cells):
+        if week != current_week:
+            current_week = week
+            absences = 0
+        if cell in (CELL_ABSENT, CELL_ELIMINATED):
+            absences += 1
+        eliminated = eliminated or cell == CELL_ELIMINATED
+        if wanted is None or date in wanted:
+            heading, length = headings.get(date, (None, 0))
+            days.append(DayCheck(date, heading, length, CELL_TEXT[cell], absences, eliminated))
+    return UserCheck(user, str(user_tz), cohort.name, days)
+
+
+def parse_export_formats(value):
+    formats = []
+    for name in value.split(','):
+        name = name.strip().lower()
+        if name in EXPORT_FORMATS:
+            formats.append(name)
+        elif name:
+            logging.warning(f"Unknown export format: {name}")
+    return formats
+
+
+def get_export_path(cohort, extension):
+    return f"{os.path.splitext(cohort.readme_file)[0]}.status.{extension}"
+
+
+# 每个用户一条记录：statuses 为按日期排列的状态码字符串，absences 包含导致淘汰的那次缺勤
+def build_status_records(table, cohort):
+    dates = [date.date().isoformat() for date in get_date_range(cohort)]
+    records = []
+    for row in table.rows:
+        if row.user is None:
+            continue
+        statuses = row.statuses[:len(dates)]
+        cells = get_row_cells(row.line)[:len(dates)]
+        records.append({
+            'user': row.user,
+            'timezone': row.timezone,
+            'absences': statuses.count('⭕️') + statuses.count('❌'),
+            'eliminated_on': next((date for date, status in zip(dates, statuses)
+                                   if status == '❌'), None),
+            'statuses': ''.join('?' if cell is None else STATUS_CODES[CELL_TEXT[cell] or '']
+                                for cell in cells),
+        })
+    return dates, records
+
+
+# 先写同目录的临时文件再 os.replace，读取方不会看到写了一半的文件
+def write_export_file(path, write, binary=False):
+    fd, temp_path = tempfile.mkstemp(
+        dir=os.path.dirname(os.path.abspath(path)), prefix='.export.', suffix='.tmp')
+    try:
+        if binary:
+            os.close(fd)
+            write(temp_path)
+        else:
+            with os.fdopen(fd, 'w', encoding='utf-8', newline='') as file:
+                write(file)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+
+
+def write_parquet_export(path, dates, records, summary):
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        logging.warning("pyarrow is not installed, skipping parquet export")
+        return
+    columns = {key: [record[key] for record in records]
+               for key in ('user', 'timezone', 'absences', 'eliminated_on')}
+    for i, date in enumerate(dates):
+        columns[date] = [record['statuses'][i:i + 1] for record in records]
+    arrow_table = pyarrow.table(columns).replace_schema_metadata(
+        {'summary': json.dumps(summary, ensure_ascii=False)})
+    write_export_file(path, lambda temp_path: pyarrow.parquet.write_table(arrow_table, temp_path),
+                      binary=True)
+
+
+# 在 README 旁边输出打卡矩阵：<README>.status.json 为日期、状态码和统计数据，
+# 用户数据按 formats 写入 .jsonl / .csv / .parquet
+def export_status(table, cohort, stats, formats):
+    dates, records = build_status_records(table, cohort)
+    summary = {
+        'cohort': cohort.name,
+        'start_date': cohort.start_date.isoformat(),
+        'end_date': cohort.end_date.isoformat(),
+        'dates': dates,
+        'codes': {code: status for status, code in STATUS_CODES.items()},
+        'statistics': stats,
+    }
+    write_export_file(get_export_path(cohort, 'json'),
+                      lambda file: json.dump(summary, file, ensure_ascii=False, indent=2))
+    if 'jsonl' in formats:
+        write_export_file(get_export_path(cohort, 'jsonl'), lambda file: file.writelines(
+            json.dumps(record, ensure_ascii=False) + '\n' for record in records))
+    if 'csv' in formats:
+        import csv
+
+        def write_csv(file):
+            writer = csv.writer(file)
+            writer.writerow(['user', 'timezone', 'absences', 'eliminated_on'] + dates)
+            for record in records:
+                writer.writerow([record['user'], record['timezone'] or '', record['absences'],
+                                 record['eliminated_on'] or ''] + list(record['statuses']))
+        write_export_file(get_export_path(cohort, 'csv'), write_csv)
+    if 'parquet' in formats:
+        write_parquet_export(get_export_path(cohort, 'parquet'), dates, records, summary)
+    logging.info(f"Exported {len(records)} rows for {cohort.name}: {', '.join(formats)}")
+
+
+# 返回 ('initial', None) 或 ('rows', 每页行数)，不分页时返回 None
+def parse_page_mode(value):
+    value = value.strip().lower()
+    if value in ('', '0', 'false', 'no'):
+        return None
+    if value == 'initial':
+        return 'initial', None
+    kind, _, size = value.partition(':')
+    if kind == 'rows':
+        try:
+            return 'rows', max(1, int(size or DEFAULT_PAGE_ROWS))
+        except ValueError:
+            pass
+    logging.warning(f"Invalid STATUS_PAGES: {value}. Writing a single table.")
+    return None
+
+
+def get_page_dir(cohort):
+    return f"{os.path.splitext(cohort.readme_file)[0]}.pages"
+
+
+# 读取已有的分页 {页名: (页面内容, StatusTable)}，按页名排序
+def load_pages(cohort):
+    page_dir = get_page_dir(cohort)
+    try:
+        names = sorted(name for name in os.listdir(page_dir) if name.endswith('.md'))
+    except FileNotFoundError:
+        return {}
+    pages = {}
+    for name in names:
+        with open(os.path.join(page_dir, name), 'r', encoding='utf-8') as file:
+            content = file.read()
+        table = StatusTable.parse(content)
+        if table is not None:
+            pages[name[:-len('.md')]] = (content, table)
+    return pages
+
+
+# 分页模式下完整的表格由各分页按顺序拼接而成；还没有分页时（刚切换到分页模式）读取 README 中的表格
+def load_status_table(content, cohort, pages=None):
+    if parse_page_mode(STATUS_PAGES):
+        if pages is None:
+            pages = load_pages(cohort)
+        if pages:
+            tables = [table for _, table in pages.values()]
+            return StatusTable(tables[0].header, tables[0].separator,
+                               [row for table in tables for row in table.rows])
+    return StatusTable.parse(content)
+
+
+def get_page_initial(user):
+    initial = user[:1].upper()
+    return initial if initial.isalnum() else '_'
+
+
+# [(页名, [TableRow])]；按首字母分页时页名即首字母，页内保持表格中的行顺序
+def split_pages(rows, mode):
+    kind, size = mode
+    if kind == 'rows':
+        return [(f"{i // size + 1:03d}", rows[i:i + size]) for i in range(0, len(rows), size)]
+    pages = {}
+    for row in rows:
+        pages.setdefault(get_page_initial(row.user), []).append(row)
+    return sorted(pages.items())
+
+
+def render_page(cohort, name, table):
+    readme = os.path.basename(cohort.readme_file)
+    return f"# {cohort.name} {name}\n\n[{readme}](../{readme})\n\n{table.render()}\n"
+
+
+# 只改写内容有变化的分页，删除不再需要的旧分页；返回 split_pages() 的结果
+def write_pages(cohort, table, mode, pages):
+    page_dir = get_page_dir(cohort)
+    os.makedirs(page_dir, exist_ok=True)
+    new_pages = split_pages([row for row in table.rows if row.user is not None], mode)
+    written = 0
+    for name, rows in new_pages:
+        text = render_page(cohort, name, StatusTable(table.header, table.separator, rows))
+        if name in pages and pages[name][0] == text:
+            continue
+        write_export_file(os.path.join(page_dir, f"{name}.md"), lambda file: file.write(text))
+        written += 1
+    for name in set(pages) - {name for name, _ in new_pages}:
+        os.remove(os.path.join(page_dir, f"{name}.md"))
+        logging.info(f"Removed empty status page {name}")
+    logging.info(f"Rewrote {written} of {len(new_pages)} status pages in {page_dir}")
+    return new_pages
+
+
+# README 中表格位置的分页目录：每页的用户范围、人数和淘汰人数
+def render_page_index(cohort, pages):
+    from urllib.parse import quote
+    page_dir = quote(os.path.basename(get_page_dir(cohort)))
+    lines = [TABLE_START_MARKER, '| 分页 | 用户 | 人数 | 淘汰人数 |', '| ---- | ---- | ---- | ---- |']
+    for name, rows in pages:
+        lines.append(f"| [{name}]({page_dir}/{quote(name)}.md) | {rows[0].user} - {rows[-1].user} "
+                     f"| {len(rows)} | {sum(1 for row in rows if '❌' in row.statuses)} |")
+    lines.append(TABLE_END_MARKER)
+    return '\n'.join(lines)
+
+
+def update_cohort_readme(cohort, cache=None, files=None, export_formats=()):
+    logging.info(
+        f"Updating cohort {cohort.name}: {cohort.start_date} - {cohort.end_date}, "
+        f"{cohort.directory}/*{cohort.file_suffix} -> {cohort.readme_file}")
+    with open(cohort.readme_file, 'r', encoding='utf-8') as file:
+        content = file.read()
+    markers = find_readme_markers(content)
+    replacements = []
+    mode = parse_page_mode(STATUS_PAGES)
+    pages = load_pages(cohort) if mode else None
+    table = update_status_table(content, cohort, cache, files, pages)
+    if table:
+        if mode:
+            with profiler.stage('write'):
+                table_block = render_page_index(cohort, write_pages(cohort, table, mode, pages))
+        else:
+            with profiler.stage('render'):
+                table_block = table.render()
+        replacements.append((markers[TABLE_START_MARKER],
+                             markers[TABLE_END_MARKER] + len(TABLE_END_MARKER), table_block))
+    stats = None
+    current_date = datetime.now(pytz.UTC)
+    if current_date > cohort.end_date or STATUS_ANALYTICS:
+        with profiler.stage('statistics'):
+            stats = calculate_statistics(content, table)
+        if stats:
+            stats_text = format_statistics(stats)
+            if STATUS_ANALYTICS and table:
+                with profiler.stage('statistics'):
+                    stats_text += format_analytics(calculate_analytics(table, cohort), cohort)
+            stats_block = f"{STATS_START_MARKER}\n{stats_text}{STATS_END_MARKER}"
+            if STATS_START_MARKER in markers and STATS_END_MARKER in markers:
+                # 替换已有的统计数据
+                replacements.append((markers[STATS_START_MARKER],
+                                     markers[STATS_END_MARKER] + len(STATS_END_MARKER), stats_block))
+            elif TABLE_END_MARKER in markers:
+                # 在 TABLE_END_MARKER 后插入统计数据
+                insert_position = markers[TABLE_END_MARKER] + len(TABLE_END_MARKER)
+                replacements.append((insert_position, insert_position, "\n\n" + stats_block))
+            else:
+                logging.warning(
+                    f"{TABLE_END_MARKER} marker not found. Appending stats to the end.")
+                replacements.append((len(content), len(content), "\n\n" + stats_block))
+    with profiler.stage('write'):
+        updated = write_readme(cohort.readme_file, content, replacements)
+    if updated:
+        logging.info(f"{cohort.readme_file} has been successfully updated.")
+    else:
+        logging.info(f"{cohort.readme_file} is already up to date.")
+    if export_formats and table:
+        export_cohort_status(cohort, export_formats, content, table, stats)
+
+
+def export_cohort_status(cohort, formats, content, table, stats=None):
+    if stats is None:
+        with profiler.stage('statistics'):
+            stats = calculate_statistics(content, table)
+    with profiler.stage('write'):
+        export_status(table, cohort, stats, formats)
+
+
+def get_file_signature(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return f"{stat.st_mtime_ns}:{stat.st_size}"
+
+
+def get_file_signatures(files):
+    signatures = {}
+    for directory, names in files.items():
+        for name in names:
+            path = os.path.normpath(os.path.join(directory, name))
+            signature = get_file_signature(path)
+            if signature:
+                signatures[path] = signature
+    return signatures
+
+
+def is_note_file(name, cohorts):
+    return (not name.lower().startswith(EXCLUDE_PREFIXES)
+            and any(name.lower().endswith(cohort.file_suffix.lower()) for cohort in cohorts))
+
+
+# 把一批文件变化同步到 files 和 cache.blob_hashes，返回其中笔记文件的数量
+def apply_note_changes(paths, cohorts, files, cache):
+    count = 0
+    for path in paths:
+        directory, name = os.path.split(path)
+        directory = os.path.normpath(directory or '.')
+        if directory not in files or not is_note_file(name, cohorts):
+            continue
+        count += 1
+        names = files[directory]
+        signature = get_file_signature(path)
+        if signature is None:
+            if name in names:
+                names.remove(name)
+            cache.blob_hashes.pop(path, None)
+        else:
+            if name not in names:
+                names.append(name)
+            cache.blob_hashes[path] = signature
+    return count
+
+
+# 最早到来的参与者当地零点（UTC），没有已解析的笔记时返回 None
+def get_next_rollover(cache, now):
+    next_midnight = None
+    for timezone in {note['timezone'] for note in cache.notes.values()}:
+        user_tz = resolve_timezone(timezone)
+        tomorrow = now.astimezone(user_tz).date() + timedelta(days=1)
+        midnight = localize(user_tz, datetime(tomorrow.year, tomorrow.month, tomorrow.day))
+        if next_midnight is None or midnight < next_midnight:
+            next_midnight = midnight
+    return next_midnight
+
+
+# 等到笔记变化或下一个当地零点；收到变化后继续等待 WATCH_DEBOUNCE_SECONDS 合并连续的写入
+def wait_for_changes(watcher, cache):
+    now = datetime.now(pytz.UTC)
+    rollover = get_next_rollover(cache, now)
+    timeout = None if rollover is None else max(0, (rollover - now).total_seconds()) + 1
+    changed = watcher.wait(timeout)
+    if not changed:
+        return changed
+    deadline = time.monotonic() + WATCH_MAX_DELAY_SECONDS
+    while time.monotonic() < deadline:
+        more = watcher.wait(WATCH_DEBOUNCE_SECONDS)
+        if more is None:
+            return None
+        if not more:
+            break
+        changed |= more
+    return changed
+
+
+# 常驻模式：解析结果保存在内存中的 StatusCache 里，以文件 mtime 和大小代替 git blob。
+# 每批变化只重新解析被修改的笔记，其余用户直接复用缓存的格子；到达某个时区的零点时
+# 只有该时区的用户会重新计算
+def watch_readmes(cohorts, watcher=None, verify_commits=False, export_formats=()):
+    import note_watcher
+    files = discover_note_files(cohorts)
+    cache = StatusCache(get_file_signatures(files))
+    cache.snapshots = load_snapshot_store()
+    watcher = watcher or note_watcher.create_watcher(sorted(files), WATCH_POLL_SECONDS)
+    dirty = True
+    try:
+        while True:
+            if dirty:
+                if verify_commits:
+                    cache.commit_times = load_commit_times(cohorts)
+                for cohort in cohorts:
+                    try:
+                        update_cohort_readme(cohort, cache, files, export_formats)
+                    except Exception as e:
+                        logging.error(f"Failed to update cohort {cohort.name}: {str(e)}")
+                cache.rotate()
+            changed = wait_for_changes(watcher, cache)
+            if changed is None:
+                logging.warning("Watch events overflowed, rescanning note directories")
+                files = discover_note_files(cohorts)
+                cache.blob_hashes = get_file_signatures(files)
+                dirty = True
+            elif changed:
+                count = apply_note_changes(changed, cohorts, files, cache)
+                if count:
+                    logging.info(f"{count} note files changed")
+                dirty = count > 0
+            else:
+                logging.info("Local midnight reached, rolling over the today column")
+                dirty = True
+    except KeyboardInterrupt:
+        logging.info("Watch mode stopped")
+    finally:
+        watcher.close()
+
+
+def get_profile_file():
+    if SYNC_PROFILE.lower() in ('', '0', 'false', 'no'):
+        return ''
+    if SYNC_PROFILE.lower() in ('1', 'true', 'yes'):
+        return DEFAULT_PROFILE_FILE
+    return SYNC_PROFILE
+
+
+def load_run_state(verify_commits=False, recompute=False):
+    cohorts = load_cohorts()
+    with profiler.stage('discovery'):
+        files = discover_note_files(cohorts)
+    cache = StatusCache.load(with_blobs=len(cohorts) > 1 or NOTE_SOURCE == 'forks')
+    cache.snapshots = load_snapshot_store()
+    if NOTE_SOURCE == 'forks':
+        try:
+            load_fork_notes(cohorts, files, cache)
+        except Exception as e:
+            logging.error(f"Failed to load notes from forks: {str(e)}")
+    cache.recompute = recompute
+    if verify_commits:
+        with profiler.stage('discovery'):
+            cache.commit_times = load_commit_times(cohorts)
+    return cohorts, files, cache
+
+
+def sync_readmes(verify_commits=False, export_formats=(), recompute=False):
     try:
         print_variables(
             'START_DATE', 'END_DATE', 'DEFAULT_TIMEZONE',
@@ -426,54 +1960,236 @@ def main():
             TABLE_START_MARKER=TABLE_START_MARKER,
             TABLE_END_MARKER=TABLE_END_MARKER
         )
-        with open(README_FILE, 'r', encoding='utf-8') as file:
-            content = file.read()
-        new_content = update_readme(content)
-        current_date = datetime.now(pytz.UTC)
-        if current_date > END_DATE:
-            stats = calculate_statistics(new_content)
-            if stats:
-                stats_content = f"\n\n## 统计数据\n\n"
-                stats_content += f"- 总参与人数: {stats['total_participants']}\n"
-                stats_content += f"- 完成人数: {stats['completed_participants']}\n"
-                stats_content += f"- 完成用户: {', '.join(stats['completed_users'])}\n"
-                stats_content += f"- 全勤用户: {', '.join(stats['perfect_attendance_users'])}\n"
-                stats_content += f"- 淘汰人数: {stats['eliminated_participants']}\n"
-                stats_content += f"- 淘汰率: {stats['elimination_rate']:.2f}%\n"
-                stats_content += f"- Fork人数: {stats['fork_count']}\n"
-            # 将统计数据添加到文件末尾
-            # 在<!-- END_COMMIT_TABLE -->标记后插入统计数据
-                stats_start = new_content.find(
-                    "<!-- STATISTICALDATA_START -->")
-                stats_end = new_content.find("<!-- STATISTICALDATA_END -->")
-
-                if stats_start != -1 and stats_end != -1:
-                    # Replace existing statistical data
-                    new_content = new_content[:stats_start] + "<!-- STATISTICALDATA_START -->\n" + stats_content + \
-                        "<!-- STATISTICALDATA_END -->" + \
-                        new_content[stats_end +
-                                    len("<!-- STATISTICALDATA_END -->"):]
-                else:
-                    # Add new statistical data after <!-- END_COMMIT_TABLE -->
-                    end_table_marker = "<!-- END_COMMIT_TABLE -->"
-                    end_table_index = new_content.find(end_table_marker)
-                    if end_table_index != -1:
-                        insert_position = end_table_index + \
-                            len(end_table_marker)
-                        new_content = new_content[:insert_position] + "\n\n<!-- STATISTICALDATA_START -->\n" + \
-                            stats_content + "<!-- STATISTICALDATA_END -->" + \
-                            new_content[insert_position:]
-                    else:
-                        logging.warning(
-                            "<!-- END_COMMIT_TABLE --> marker not found. Appending stats to the end.")
-                        new_content += "\n\n<!-- STATISTICALDATA_START -->\n" + \
-                            stats_content + "<!-- STATISTICALDATA_END -->"
-        with open(README_FILE, 'w', encoding='utf-8') as file:
-            file.write(new_content)
-        logging.info("README.md has been successfully updated.")
+        cohorts, files, cache = load_run_state(verify_commits, recompute)
+        for cohort in cohorts:
+            try:
+                update_cohort_readme(cohort, cache, files, export_formats)
+            except Exception as e:
+                logging.error(f"Failed to update cohort {cohort.name}: {str(e)}")
+        cache.save()
     except Exception as e:
         logging.error(f"An error occurred in main function: {str(e)}")
 
 
+# 只生成导出文件，不改写 README
+def export_readmes(formats, verify_commits=False):
+    cohorts, files, cache = load_run_state(verify_commits)
+    for cohort in cohorts:
+        with open(cohort.readme_file, 'r', encoding='utf-8') as file:
+            content = file.read()
+        table = update_status_table(content, cohort, cache, files)
+        if table:
+            export_cohort_status(cohort, formats, content, table)
+    cache.save()
+
+
+def command_render(args):
+    sync_readmes(args.verify_commits, parse_export_formats(args.export), args.recompute)
+
+
+def command_watch(args):
+    watch_readmes(load_cohorts(), verify_commits=args.verify_commits,
+                  export_formats=parse_export_formats(args.export))
+
+
+# 直接读取 README 中已有的表格计算统计数据，不重新生成表格
+def command_stats(args):
+    cohorts = load_cohorts()
+    for cohort in cohorts:
+        with open(cohort.readme_file, 'r', encoding='utf-8') as file:
+            content = file.read()
+        stats = calculate_statistics(content, load_status_table(content, cohort))
+        if not stats:
+            return 1
+        if len(cohorts) > 1:
+            print(f"# {cohort.name}")
+        print(format_statistics(stats).strip())
+    return 0
+
+
+# target 可以是用户名，也可以是笔记文件路径（PR 检查时直接传入改动的文件）
+def resolve_check_target(target, cohorts, name=None):
+    if name:
+        cohorts = [cohort for cohort in cohorts if cohort.name == name]
+    directory, file_name = os.path.split(os.path.normpath(target))
+    for cohort in cohorts:
+        suffix = cohort.file_suffix
+        if (os.path.normpath(directory or '.') == os.path.normpath(cohort.directory)
+                and is_note_file(file_name, [cohort]) and len(file_name) > len(suffix)):
+            return file_name[:-len(suffix)], cohort
+    for cohort in cohorts:
+        if file_exists(target, cohort):
+            return target, cohort
+    # 不在任何一期目录中的笔记（例如 PR 中改动的 test/X_EICL1st.md）：按给出的路径读取，
+    # 日期等设置沿用文件后缀相同的那一期
+    if os.path.isfile(target):
+        for cohort in cohorts:
+            if is_note_file(file_name, [cohort]) and len(file_name) > len(cohort.file_suffix):
+                return file_name[:-len(cohort.file_suffix)], cohort._replace(directory=directory or '.')
+    return target, None
+
+
+# argparse 的 type：日期写作 YYYY-MM-DD，格式错误时给出用法提示而不是异常
+def parse_date_argument(value):
+    try:
+        return datetime.fromisoformat(value).date()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid date: {value!r} (expected YYYY-MM-DD)")
+
+
+# today 要等读出笔记中的时区后才能换算，先原样保留
+def parse_check_date_argument(value):
+    return value if value == 'today' else parse_date_argument(value)
+
+
+def parse_check_date(value, timezone):
+    if value == 'today':
+        return get_local_today(resolve_timezone(timezone)).date()
+    return value
+
+
+CHECK_STATUS_LABELS = {"✅": "✅", "⭕️": "⭕️", "❌": "❌", " ": "pending", None: "-"}
+
+
+def command_check(args):
+    user, cohort = resolve_check_target(args.target, load_cohorts(), args.cohort)
+    if cohort is None:
+        logging.error(f"Could not find a note for {args.target}")
+        return 1
+    commit_times = None
+    if args.verify_commits:
+        path = get_note_path(user, cohort)
+        commit_times = load_commit_times([cohort], [path])
+        if commit_times is not None:
+            commit_times = commit_times.get(path, [])
+    try:
+        result = check_user(user, cohort=cohort, commit_times=commit_times)
+    except NoteOverBudget as e:
+        logging.warning(f"{get_note_path(user, cohort)}: {str(e)}")
+        if args.json:
+            print(json.dumps({'user': user, 'cohort': cohort.name, 'status': SKIPPED_STATUS},
+                             ensure_ascii=False, indent=2))
+        else:
+            print(f"{user} ({cohort.name}): {SKIPPED_STATUS}")
+        return 2 if args.require_done else 0
+    if args.date:
+        start = parse_check_date(args.date, result.timezone)
+        end = parse_check_date(args.until, result.timezone) if args.until else start
+        days = [day for day in result.days if start <= day.date <= end]
+        if not days:
+            logging.error(f"{args.date} is outside {cohort.name}")
+            return 1
+        result = result._replace(days=days)
+
+    if args.json:
+        print(json.dumps({**result._asdict(), 'days': [
+            {**day._asdict(), 'date': day.date.isoformat()} for day in result.days]},
+            ensure_ascii=False, indent=2))
+    else:
+        print(f"{result.user} ({result.timezone}, {result.cohort})")
+        for day in result.days:
+            print(f"{day.date.isoformat()} {CHECK_STATUS_LABELS.get(day.status, day.status)}"
+                  f"  heading: {day.heading or '-'}  length: {day.content_length}"
+                  f"  weekly absences: {day.weekly_absences}"
+                  + ("  eliminated" if day.eliminated else ""))
+    if args.require_done and any(day.status != "✅" for day in result.days):
+        return 2
+    return 0
+
+
+def command_export(args):
+    export_readmes(parse_export_formats(args.formats), args.verify_commits)
+
+
+# 更正历史状态：删除封存的日期后重新生成 README，重新计算的状态会再次封存
+def command_reseal(args):
+    store = load_snapshot_store()
+    if store is None:
+        logging.error("STATUS_SNAPSHOT_FILE is not set")
+        return 1
+    cohorts = load_cohorts()
+    if args.cohort:
+        cohorts = [cohort for cohort in cohorts if cohort.name == args.cohort]
+    since = args.since.isoformat() if args.since else None
+    for cohort in cohorts:
+        count = store.reseal(get_cohort_key(cohort), args.users, since)
+        logging.info(f"Unsealed {count} days of {cohort.name}")
+    store.close()
+    sync_readmes(args.verify_commits, parse_export_formats(args.export), recompute=True)
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog='sync_status_readme',
+        description='Sync the study status table in README.md (the default command is render)')
+    # --profile 不带参数，否则会把后面的子命令名当成文件名
+    parser.add_argument('--profile', action='store_true', default=bool(get_profile_file()),
+                        help='record per-stage timings and write them as JSON')
+    parser.add_argument('--profile-file', default=get_profile_file() or DEFAULT_PROFILE_FILE,
+                        metavar='FILE', help=f"where --profile writes the timings (default {DEFAULT_PROFILE_FILE})")
+    parser.add_argument('--cprofile', default=SYNC_CPROFILE, metavar='FILE',
+                        help='dump cProfile stats of the whole run')
+    parser.add_argument('--verify-commits', action='store_true', default=VERIFY_COMMITS,
+                        help='count a day only if its note was committed on that local day')
+    parser.set_defaults(handler=command_render, export=STATUS_EXPORT, recompute=False)
+    subparsers = parser.add_subparsers(metavar='COMMAND')
+
+    render = subparsers.add_parser('render', help='rebuild the status tables and statistics in README')
+    render.add_argument('--recompute', action='store_true',
+                        help='read every note again instead of reusing rows of eliminated users')
+    render.set_defaults(handler=command_render)
+    watch = subparsers.add_parser('watch', help='keep running and update rows as note files change')
+    watch.set_defaults(handler=command_watch)
+    reseal = subparsers.add_parser('reseal', help='drop sealed days from the snapshot store and render again')
+    reseal.add_argument('users', nargs='*', help='nicknames to reseal, defaults to everyone')
+    reseal.add_argument('--since', metavar='DATE', type=parse_date_argument, help='only reseal days from this date (YYYY-MM-DD) on')
+    reseal.add_argument('--cohort', help='cohort name from SYNC_CONFIG')
+    reseal.set_defaults(handler=command_reseal)
+    for subparser in (render, watch, reseal):
+        subparser.add_argument('--export', default=STATUS_EXPORT, metavar='FORMATS',
+                               help=f"also write the status matrix ({', '.join(EXPORT_FORMATS)})")
+
+    stats = subparsers.add_parser('stats', help='print statistics of the current README tables')
+    stats.set_defaults(handler=command_stats)
+
+    check = subparsers.add_parser('check', help="print one participant's status")
+    check.add_argument('target', help='nickname or path of the note file')
+    check.add_argument('date', nargs='?', type=parse_check_date_argument,
+                       help='YYYY-MM-DD or today, defaults to the whole cohort')
+    check.add_argument('--until', metavar='DATE', type=parse_check_date_argument,
+                       help='check every day from date until this one')
+    check.add_argument('--cohort', help='cohort name from SYNC_CONFIG')
+    check.add_argument('--json', action='store_true', help='print the result as JSON')
+    check.add_argument('--require-done', action='store_true',
+                       help='exit with status 2 unless every checked day is ✅')
+    check.set_defaults(handler=command_check)
+
+    export = subparsers.add_parser('export', help='write the status matrix without touching README')
+    export.add_argument('--formats', default=STATUS_EXPORT or 'jsonl',
+                        help=f"comma separated: {', '.join(EXPORT_FORMATS)}")
+    export.set_defaults(handler=command_export)
+    return parser
+
+
+def main(argv=()):
+    args = build_parser().parse_args(argv)
+    profiler.reset(enabled=bool(args.profile))
+    cprofile = None
+    if args.cprofile:
+        import cProfile
+        cprofile = cProfile.Profile()
+        cprofile.enable()
+    try:
+        return args.handler(args)
+    finally:
+        if cprofile:
+            cprofile.disable()
+            cprofile.dump_stats(args.cprofile)
+            logging.info(f"cProfile stats written to {args.cprofile}")
+        if args.profile:
+            profiler.write(args.profile_file)
+
+
 if __name__ == "__main__":
-    main()
+    sys.exit(main(sys.argv[1:]))